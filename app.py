@@ -26,32 +26,27 @@ st.title("📄 PDF Viewer")
 # ===============================
 # ネットワーク情報ユーティリティ
 # ===============================
+# 再実行（rerun）のたびに socket を開かないよう 60 秒キャッシュする
+@st.cache_data(ttl=60, show_spinner=False)
 def get_lan_ip() -> str:
     """
     現在アクティブなNICの IPv4（例: 192.168.x.x / 10.x.x.x）を取得。
     取得不能時は '取得できませんでした' を返す。
     """
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        # 実通信は発生しないが、使用NICを判定するためのダミー接続
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-    except Exception:
-        ip = "取得できませんでした"
-    finally:
-        try:
-            s.close()
-        except Exception:
-            pass
-    return ip
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            # 実通信は発生しないが、使用NICを判定するためのダミー接続
+            s.connect(("8.8.8.8", 80))
+            return s.getsockname()[0]
+    except OSError:
+        return "取得できませんでした"
 
 
 def get_localhost_ip() -> str:
-    """localhost（ループバック）のIP。通常は 127.0.0.1。"""
-    try:
-        return socket.gethostbyname("localhost")
-    except Exception:
-        return "127.0.0.1"
+    """
+    localhost（ループバック）のIP。表示用 URL にしか使わないので DNS は引かない。
+    """
+    return "127.0.0.1"
 
 
 # ===============================
@@ -62,22 +57,31 @@ DEFAULT_PORT = 8503
 DEFAULT_BASE = "/doc-manager"
 
 # 環境変数や secrets で上書き可能にしておく（任意）
-port = int(
-    os.getenv("STREAMLIT_PORT")
-    or os.getenv("PORT")
-    or (st.secrets.get("server", {}).get("port", DEFAULT_PORT) if hasattr(st, "secrets") else DEFAULT_PORT)
-)
-
-base = (
-    os.getenv("BASE_URL_PATH")
-    or (st.secrets.get("server", {}).get("baseUrlPath", DEFAULT_BASE) if hasattr(st, "secrets") else DEFAULT_BASE)
-    or DEFAULT_BASE
-)
-base = base.strip()
-if not base.startswith("/"):
-    base = "/" + base
-if not base.endswith("/"):
-    base = base + "/"
+# 設定変更には Streamlit の再起動が必要なので、rerun ごとに解決し直さずキャッシュする。
+# （app.py は rerun のたびに再実行されるため、functools.lru_cache では関数ごと作り直されて効かない）
+@st.cache_data(show_spinner=False)
+def _resolve_port_base() -> tuple[int, str]:
+    """(port, base) を返す。base は必ず '/' で始まり '/' で終わる形に正規化する。"""
+    port = int(
+        os.getenv("STREAMLIT_PORT")
+        or os.getenv("PORT")
+        or (st.secrets.get("server", {}).get("port", DEFAULT_PORT) if hasattr(st, "secrets") else DEFAULT_PORT)
+    )
+
+    base = (
+        os.getenv("BASE_URL_PATH")
+        or (st.secrets.get("server", {}).get("baseUrlPath", DEFAULT_BASE) if hasattr(st, "secrets") else DEFAULT_BASE)
+        or DEFAULT_BASE
+    )
+    base = base.strip()
+    if not base.startswith("/"):
+        base = "/" + base
+    if not base.endswith("/"):
+        base = base + "/"
+    return port, base
+
+
+port, base = _resolve_port_base()
 
 # ===============================
 # 🖥️ ローカルIP/URL 表示
@@ -89,11 +93,14 @@ localhost_url = f"http://{localhost_ip}:{port}{base}"
 lan_url = f"http://{lan_ip}:{port}{base}" if lan_ip != "取得できませんでした" else "取得できませんでした"
 
 st.markdown("### 🖥️ アクセス用URL")
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown(f"- **このMac専用（localhost）**: `{localhost_url}`")
-with col2:
-    st.markdown(f"- **LAN内の他端末から**: `{lan_url}`")
+# 1 回の描画（delta）で済むよう、まとめて 1 つの st.code にする
+st.code(
+    "\n".join([
+        f"このMac専用（localhost）: {localhost_url}",
+        f"LAN内の他端末から       : {lan_url}",
+    ]),
+    language=None,
+)
 
 st.caption(
     "※ LAN URL が '取得できませんでした' の場合は、Wi-Fi/有線が有効か確認してください。"
@@ -103,15 +110,19 @@ st.caption(
 # 📂 現在のパス設定
 # ===============================
 st.subheader("📂 現在のパス設定")
-st.text(f"Location (env.location): {PATHS.env}")
-st.text(f"APP_ROOT        : {APP_ROOT}（アプリフォルダーへのパス）")
-# st.text(f"PDF Root        : {PATHS.pdf_root}")
-# st.text(f"Converted Root  : {PATHS.converted_root}")
-# st.text(f"Text Root       : {PATHS.text_root}")
-st.text(f"Library Root    : {PATHS.library_root}")
-
-st.text(f"original_docs_root    : {PATHS.original_docs_root}(原本データへのパス)")
-st.text(f"organized_docs_root    : {PATHS.organized_docs_root}（整理したpdfファイルへのパス）")
+st.code(
+    "\n".join([
+        f"Location (env.location): {PATHS.env}",
+        f"APP_ROOT        : {APP_ROOT}（アプリフォルダーへのパス）",
+        # f"PDF Root        : {PATHS.pdf_root}",
+        # f"Converted Root  : {PATHS.converted_root}",
+        # f"Text Root       : {PATHS.text_root}",
+        f"Library Root    : {PATHS.library_root}",
+        f"original_docs_root    : {PATHS.original_docs_root}(原本データへのパス)",
+        f"organized_docs_root    : {PATHS.organized_docs_root}（整理したpdfファイルへのパス）",
+    ]),
+    language=None,
+)
 
 # ===============================
 # ナビゲーション
@@ -8,38 +8,76 @@
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Sequence, Tuple
+from functools import lru_cache
 import os
-
-# --- optional: Streamlit は不要（存在すれば利用可） ---
-try:
-    import streamlit as st  # noqa: F401
-except Exception:
-    st = None  # type: ignore
+import re
+import stat
 
 # --- toml loader (3.11+: tomllib / fallback: tomli) ---
-try:  # Python 3.11+
-    import tomllib as _toml
-except Exception:  # 3.10 以下など
-    try:
-        import tomli as _toml  # type: ignore
-    except Exception:
-        _toml = None  # toml 読み込み不可
+# 初回のパース時にだけ import する（モジュール import を軽くするため）
+_toml: Any = None
+_toml_checked = False
+
+def _get_toml() -> Any:
+    """tomllib（無ければ tomli）を遅延 import して返す。どちらも無ければ None。"""
+    global _toml, _toml_checked
+    if not _toml_checked:
+        try:  # Python 3.11+
+            import tomllib as mod
+        except Exception:  # 3.10 以下など
+            try:
+                import tomli as mod  # type: ignore
+            except Exception:
+                mod = None  # toml 読み込み不可
+        _toml = mod
+        _toml_checked = True
+    return _toml
 
 APP_ROOT = Path(__file__).resolve().parents[1]
 
+# [app].available_presets が未定義のときの既定（TOML の値は既に str なので変換しない）
+_DEFAULT_PRESETS: Tuple[str, ...] = ("Develop", "Home", "Prec", "Server")
+
 # ================= ユーティリティ =================
 
-def _load_toml(path: Path) -> Dict[str, Any]:
-    """TOML を辞書で返す。存在しない/読めない場合は空 dict。"""
-    if not path.exists() or not path.is_file() or _toml is None:
+def _abs(p: Path) -> Path:
+    """
+    字句的に絶対パス化（'..' の正規化のみ）。
+    Path.resolve() と違い、symlink 解決のための stat をパス要素ごとに発行しない。
+    """
+    return Path(os.path.abspath(p))
+
+@lru_cache(maxsize=8)
+def _load_toml_cached(path_str: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """
+    TOML を実際にパースする本体（(path, mtime_ns, size) をキーにキャッシュ）。
+    - ファイルが更新されれば mtime_ns/size が変わり、自動的に再パースされる。
+    - 戻り値は共有されるため、呼び出し側で変更しないこと。
+    """
+    toml = _get_toml()
+    if toml is None:
         return {}
     try:
-        with path.open("rb") as f:
-            return dict(_toml.load(f))
+        with open(path_str, "rb") as f:
+            return dict(toml.load(f))
     except Exception:
         return {}
 
+def _load_toml(path: Path) -> Dict[str, Any]:
+    """TOML を辞書で返す。存在しない/読めない場合は空 dict。"""
+    try:
+        info = path.stat()
+    except OSError:
+        return {}
+    if not stat.S_ISREG(info.st_mode):
+        return {}
+    return _load_toml_cached(str(path), info.st_mtime_ns, info.st_size)
+
+# _get_settings_file の探索結果（APP_SETTINGS_FILE が変わったときだけ再探索）
+_SETTINGS_FILE: Optional[Path] = None
+_SETTINGS_ENV: Optional[str] = None
+
 def _get_settings_file() -> Path:
     """
     設定ファイルの探索順:
@@ -47,25 +85,31 @@ def _get_settings_file() -> Path:
       2) APP_ROOT/config/settings.toml
       3) APP_ROOT/.streamlit/settings.toml
       4) APP_ROOT/settings.toml
+    結果はモジュール内に保持し、2 回目以降は stat せずに返す。
     """
+    global _SETTINGS_FILE, _SETTINGS_ENV
     env = os.getenv("APP_SETTINGS_FILE")
+    if _SETTINGS_FILE is not None and env == _SETTINGS_ENV:
+        return _SETTINGS_FILE
+
     if env:
         p = Path(env)
         if not p.is_absolute():
             p = (APP_ROOT / p)
-        return p.resolve()
-
-    candidates = [
-        APP_ROOT / "config" / "settings.toml",
-        APP_ROOT / ".streamlit" / "settings.toml",
-        APP_ROOT / "settings.toml",
-    ]
-    for c in candidates:
-        c = c.resolve()
-        if c.exists() and c.is_file():
-            return c
+        found = _abs(p)
+    else:
+        candidates = [
+            APP_ROOT / "config" / "settings.toml",
+            APP_ROOT / ".streamlit" / "settings.toml",
+            APP_ROOT / "settings.toml",
+        ]
+        found = next(
+            (_abs(c) for c in candidates if os.path.isfile(c)),
+            _abs(APP_ROOT / "config" / "settings.toml"),
+        )
 
-    return (APP_ROOT / "config" / "settings.toml").resolve()
+    _SETTINGS_FILE, _SETTINGS_ENV = found, env
+    return found
 
 def _sanitize_spec(s: str) -> str:
     """
@@ -75,7 +119,10 @@ def _sanitize_spec(s: str) -> str:
     """
     return s.replace("\\ ", " ").strip()
 
-def _resolve(spec: Optional[str], *, mounts: Dict[str, Any], default: Path) -> Path:
+# "project:SUBPATH" / "mount:Name[/subpath]" を 1 回のマッチで (scheme, name, subpath) に分解
+_SPEC_RE = re.compile(r"(project|mount):\s*([^/]*)(?:/(.*))?", re.DOTALL)
+
+def _resolve(spec: Optional[str], mounts: Dict[str, Any], default: Path) -> Path:
     """
     パス指定子を実パスに解決。
       - project:SUBPATH           → APP_ROOT/SUBPATH
@@ -86,33 +133,60 @@ def _resolve(spec: Optional[str], *, mounts: Dict[str, Any], default: Path) -> P
     """
     if not spec:
         return default
-    s = _sanitize_spec(str(spec))
+    s = str(spec).replace("\\ ", " ").strip()  # _sanitize_spec をインライン化
     if not s:
         return default
 
-    if s.startswith("project:"):
-        rel = s.split(":", 1)[1].strip()
-        return (APP_ROOT / rel).resolve()
-
-    if s.startswith("mount:"):
-        rest = s.split(":", 1)[1].strip()
-        if not rest:
-            return default
-        if "/" in rest:
-            mname, sub = rest.split("/", 1)
-            base = mounts.get(mname)
-            if base:
-                return (Path(str(base)).expanduser() / sub).resolve()
-        else:
-            base = mounts.get(rest)
-            if base:
-                return Path(str(base)).expanduser().resolve()
+    m = _SPEC_RE.fullmatch(s)
+    if m is None:
+        # 絶対/ホーム(~)/相対
+        p = Path(s).expanduser()
+        if not p.is_absolute():
+            p = (APP_ROOT / p)
+        return _abs(p)
+
+    scheme, name, sub = m.group(1), m.group(2), m.group(3)
+    if scheme == "project":
+        rel = name if sub is None else f"{name}/{sub}"
+        return _abs(APP_ROOT / rel)
+
+    # mount:
+    if not name and sub is None:
+        return default
+    base = mounts.get(name)
+    if not base:
         return default
+    p = Path(str(base)).expanduser()
+    return _abs(p / sub if sub is not None else p)
+
+@lru_cache(maxsize=64)
+def _resolve_cached(spec: Optional[str], mounts_key: Tuple[Tuple[str, str], ...], default: str) -> Path:
+    """
+    _resolve のキャッシュ版（引数はすべて hashable に変換済み）。
+    - mounts_key: tuple(sorted(mounts.items()))（値は str 化）
+    - default: 既定パスの文字列
+    同じ指定子なら同一の Path を再利用し、rerun ごとの Path 生成・正規化を省く。
+    """
+    return _resolve(spec, dict(mounts_key), Path(default))
+
+# 作成（または存在確認）済みのディレクトリ（プロセス内で共有）
+_ENSURED: set[str] = set()
 
-    p = Path(s).expanduser()
-    if not p.is_absolute():
-        p = (APP_ROOT / p)
-    return p.resolve()
+def _ensure_dirs(paths: List[Path]) -> None:
+    """
+    ディレクトリをまとめて作成する（読み取り専用などで失敗しても黙って無視）。
+    - 同じパスは 1 回だけ処理し、確認済みのものは以後 syscall を発行しない。
+    - 短いパスから順に処理するので、共通の親は先に確認される。
+    """
+    for sp in sorted({str(p) for p in paths}, key=len):
+        if sp in _ENSURED:
+            continue
+        try:
+            if not os.path.isdir(sp):
+                os.makedirs(sp, exist_ok=True)
+            _ENSURED.add(sp)
+        except Exception:
+            pass
 
 def _read_location_from_secrets() -> Optional[str]:
     """
@@ -154,15 +228,36 @@ class AppPaths:
       - available_presets (任意)
     """
 
-    def __init__(self, settings_path: Optional[Path] = None) -> None:
+    # (属性名, data_dir 配下の既定サブフォルダ, settings.toml トップレベルの同名キーも見るか)
+    _ROOT_SPECS: Tuple[Tuple[str, str, bool], ...] = (
+        ("pdf_root",            "pdf",            False),
+        ("converted_root",      "converted_pdf",  False),
+        ("text_root",           "text",           False),
+        ("library_root",        "library",        False),
+        ("docs_root",           "docs",           True),
+        ("original_docs_root",  "original_docs",  True),
+        ("organized_docs_root", "organized_docs", True),
+    )
+
+    pdf_root: Path
+    converted_root: Path
+    text_root: Path
+    library_root: Path
+    docs_root: Path
+    original_docs_root: Path
+    organized_docs_root: Path
+
+    def __init__(self, settings_path: Optional[Path] = None, *, ensure_dirs: bool = True) -> None:
         # 設定ロード
         self.settings_path: Path = settings_path or _get_settings_file()
-        self.settings: Dict[str, Any] = _load_toml(self.settings_path)
+        # パース結果はインスタンスに保持しない（必要時は settings プロパティで再取得）
+        settings = _load_toml(self.settings_path)
 
-        env_sec   = dict(self.settings.get("env", {}))
-        mounts    = dict(self.settings.get("mounts", {}))
-        locs_sec  = dict(self.settings.get("locations", {}))
-        app_sec   = dict(self.settings.get("app", {}))
+        # tomllib のセクションは既に dict なのでコピーせず参照する（読み取り専用）
+        env_sec   = settings.get("env") or {}
+        mounts    = settings.get("mounts") or {}
+        locs_sec  = settings.get("locations") or {}
+        app_sec   = settings.get("app") or {}
 
         # === location の決定（優先順: secrets > 環境変数 > settings.toml > 既定 "Home"） ===
         self.env: str = str(
@@ -174,58 +269,41 @@ class AppPaths:
 
         # プリセット一覧（省略可）
         aps = app_sec.get("available_presets")
-        if isinstance(aps, list):
-            self.available_presets: List[str] = [str(x) for x in aps]
-        else:
-            self.available_presets = ["Develop", "Home", "Prec", "Server"]
+        self.available_presets: Sequence[str] = aps if isinstance(aps, list) else _DEFAULT_PRESETS
 
         # ベース
         self.app_root: Path = APP_ROOT
         self.data_dir: Path = self.app_root / "data"
 
-        # 既定パス（locations 未定義時のフォールバック）
-        default_pdf         = self.data_dir / "pdf"
-        default_conv        = self.data_dir / "converted_pdf"
-        default_text        = self.data_dir / "text"
-        default_library     = self.data_dir / "library"
-        default_docs        = self.data_dir / "docs"
-        default_original    = self.data_dir / "original_docs"
-        default_organized   = self.data_dir / "organized_docs"
-
-        # 現在ロケーションの dict
-        cur = locs_sec.get(self.env, {}) if isinstance(locs_sec, dict) else {}
-
-        # 各ルート解決
-        self.pdf_root         = _resolve(cur.get("pdf_root"),         mounts=mounts, default=default_pdf)
-        self.converted_root   = _resolve(cur.get("converted_root"),   mounts=mounts, default=default_conv)
-        self.text_root        = _resolve(cur.get("text_root"),        mounts=mounts, default=default_text)
-        self.library_root     = _resolve(cur.get("library_root"),     mounts=mounts, default=default_library)
-
-        docs_spec = cur.get("docs_root") or self.settings.get("docs_root")
-        self.docs_root        = _resolve(docs_spec,                   mounts=mounts, default=default_docs)
-
-        orig_spec = cur.get("original_docs_root") or self.settings.get("original_docs_root")
-        self.original_docs_root  = _resolve(orig_spec,                mounts=mounts, default=default_original)
-
-        orgz_spec = cur.get("organized_docs_root") or self.settings.get("organized_docs_root")
-        self.organized_docs_root = _resolve(orgz_spec,                mounts=mounts, default=default_organized)
-
-        # ディレクトリ自動作成（読み取り専用でも失敗時は黙って無視）
-        for p in (
-            self.pdf_root,
-            self.converted_root,
-            self.text_root,
-            self.library_root,
-            self.docs_root,
-            self.original_docs_root,
-            self.organized_docs_root,
-        ):
-            try:
-                p.mkdir(parents=True, exist_ok=True)
-            except Exception:
-                pass
+        # 現在ロケーションの dict（settings.toml の書き損じで dict でなければ既定パスにフォールバック）
+        cur = locs_sec.get(self.env) if isinstance(locs_sec, dict) else None
+        if not isinstance(cur, dict):
+            cur = {}
+
+        # 各ルート解決（locations 未定義時は data_dir 配下の既定パスにフォールバック）
+        mounts_key = tuple(sorted((str(k), str(v) if v else "") for k, v in mounts.items()))
+        data_dir = str(self.data_dir)
+        for name, default_sub, top_level in self._ROOT_SPECS:
+            spec = cur.get(name)
+            if not spec and top_level:
+                spec = settings.get(name)
+            # 偽値（0 / "" / False など）は従来どおり未指定扱い。lru_cache のキーにするため str に揃える
+            if not spec:
+                spec = None
+            elif not isinstance(spec, str):
+                spec = str(spec)
+            setattr(self, name, _resolve_cached(spec, mounts_key, f"{data_dir}{os.sep}{default_sub}"))
+
+        # ディレクトリ自動作成（ensure_dirs=False で省略可。失敗時は黙って無視）
+        if ensure_dirs:
+            _ensure_dirs([getattr(self, name) for name, _, _ in self._ROOT_SPECS])
 
     # ---------- 便利メソッド ----------
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """settings.toml のパース結果（互換用）。_load_toml のキャッシュから返す。"""
+        return _load_toml(self.settings_path)
+
     def to_dict(self) -> Dict[str, str]:
         """主要パスを文字列化して dict で返す（デバッグ/UI表示用）。"""
         return {
@@ -247,8 +325,14 @@ class AppPaths:
         rows = [f"  {k:20s}= {v}" for k, v in d.items()]
         return "AppPaths(\n" + "\n".join(rows) + "\n)"
 
-# 既定インスタンス
-PATHS = AppPaths()
+# 既定インスタンス（PEP 562: 初回アクセス時にだけ生成する）
+#   from lib.app_paths import PATHS  はそのまま使える。
+def __getattr__(name: str) -> Any:
+    if name == "PATHS":
+        global PATHS
+        PATHS = AppPaths()
+        return PATHS
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     # 簡易動作確認
@@ -7,12 +7,15 @@
 #    - Streamlit 以外のスクリプトからも使えるよう、副作用は持たせない。
 #
 #  提供関数（public API）
-#    - is_hidden_rel(rel_parts)        : 隠しパス判定（相対パスの各要素に'.'始まりが含まれるか）
+#    - is_hidden_name(name)            : 隠し名判定（1 要素が '.' 始まりか）
+#    - is_hidden_rel(rel)              : 隠しパス判定（相対パスの各要素に'.'始まりが含まれるか）
 #    - safe_stat_mtime(p)              : mtime（modification time）を例外安全に取得
+#    - safe_stat_mtime_ns(p)           : 同上（整数ナノ秒版。比較・キャッシュキー向け）
 #    - listdir_counts(p)               : ディレクトリ直下（非再帰）の files/dirs 件数
 #    - iter_dirs(root, max_depth, ...) : 深さ制御付きのディレクトリ列挙ジェネレータ
 #    - ext_key(path)                   : 拡張子の正規化（.pdf / <none>）
 #    - walk_tree_collect(...)          : ツリー走査＋早期停止＋拡張子集計（ページの主処理を関数化）
+#    - DirRow / FileRow                : walk_tree_collect(as_tuples=True) の行データ（NamedTuple）
 # ============================================
 
 #  提供関数（Public API）— ChatGPT向けクイックリファレンス
@@ -25,12 +28,20 @@
 #
 #  1) 関数とシグネチャ
 #  ------------------------------------------------------------------
-#  is_hidden_rel(rel_parts: tuple[str, ...]) -> bool
+#  is_hidden_name(name: str) -> bool
+#      パス 1 要素（ファイル名/フォルダ名）が '.' 始まり（hidden）か判定。
+#      走査中は「降りる前に子の名前だけ判定」すれば祖先の再判定は不要。
+#
+#  is_hidden_rel(rel_parts: tuple[str, ...] | str) -> bool
 #      相対パスの各要素に '.' 始まり（hidden）が含まれるか判定。
+#      相対パス文字列（"foo/.git/x"）を直接渡すと要素に分割せずに判定する。
 #
 #  safe_stat_mtime(p: pathlib.Path) -> float
 #      パス p の mtime（UNIX epoch秒, float）を例外安全に取得。失敗時は 0.0。
 #
+#  safe_stat_mtime_ns(p: str | os.PathLike, *, follow_symlinks: bool=True) -> int
+#      mtime を整数ナノ秒（st_mtime_ns）で例外安全に取得。失敗時は 0。
+#
 #  listdir_counts(p: pathlib.Path) -> tuple[int, int]
 #      ディレクトリ p の「直下（非再帰）」の (files, dirs) 件数を返す。symlink除外。
 #
@@ -49,9 +60,11 @@
 #      name_filter: str = "",
 #      compute_counts: bool = False,
 #      max_rows_total: int = 10_000,
+#      as_tuples: bool = False,
 #  ) -> tuple[list[dict], list[dict], dict[str, int], int, int]
 #      ディレクトリ/ファイルを走査し、ページ表示に必要な構造を一括生成する上位API。
 #      （深さ制御 / 隠しフォルダpruning / 名前部分一致 / 早期停止 / 拡張子集計）
+#      as_tuples=True なら行を dict ではなく NamedTuple（DirRow / FileRow）で返す。
 #
 #  2) 戻り値スキーマ（walk_tree_collect）
 #  ------------------------------------------------------------------
@@ -73,10 +86,17 @@
 #          "depth": <int>,                          # 親フォルダの深さ
 #          "parent": "<親の相対パス:str|''>",
 #          "modified": <datetime|None>,
-#          "size_bytes": <int|None>,                # 存在確認の上取得
+#          "size_bytes": <int|None>,                # stat 失敗時は None
 #          "ext": "<'.pdf' 等|'<none>'>",           # ext_keyで正規化
 #      }
 #
+#      as_tuples=True のとき（大量行向け。1 行あたりのメモリが dict の約半分）:
+#      行は DirRow / FileRow。フィールドは上と同じだが、更新日時は float の modified_ts
+#      （epoch秒、不明は0.0）で持ち、datetime 化は表示時にまとめて行う:
+#          df["modified"] = pd.to_datetime(df["modified_ts"], unit="s").mask(df["modified_ts"] == 0)
+#      （unit="s" は UTC。ローカル時刻にするなら .dt.tz_localize("UTC").dt.tz_convert(<TZ>)）
+#      （行単位では r.modified プロパティで datetime|None を得られる）
+#
 #      filetype_counts: dict[str, int]  # 例: {'.pdf': 1234, '.txt': 98, '<none>': 3}
 #      total_rows: int                  # rows_dirs + rows_files の合計（早期停止で頭打ち可）
 #      max_depth_found: int             # 実際に検出した最大深さ（dir/fileの最大）
@@ -114,7 +134,8 @@
 #
 #  5) 実装上の注意点
 #  ------------------------------------------------------------------
-#  - os.walk(topdown=True, followlinks=False)。symlinkは追跡しません。
+#  - walk_tree_collect は os.scandir の明示スタック走査（os.walk(topdown=True) と同順）。
+#    iter_dirs も os.scandir の深さ制限付き走査。symlinkは追跡しません。
 #  - 隠しフォルダ（'.' 始まり）は列挙せず配下にも潜りません（pruning）。
 #  - name_filter はフォルダ名・ファイル名の双方に適用（case-insensitive）。
 #  - 例外（権限/一時I/O）は握りつぶします。UI側で「不明」扱いの設計を想定。
@@ -123,52 +144,99 @@
 
 from __future__ import annotations
 from pathlib import Path
-from typing import Iterator, Dict, Any, List, Tuple
+from typing import Iterable, Iterator, Dict, Any, List, NamedTuple, Optional, Tuple
+from collections import defaultdict
 import os
+import re
 import datetime as dt
 
 __all__ = [
+    "is_hidden_name",
     "is_hidden_rel",
     "safe_stat_mtime",
+    "safe_stat_mtime_ns",
     "listdir_counts",
     "iter_dirs",
     "ext_key",
     "walk_tree_collect",
+    "DirRow",
+    "FileRow",
 ]
 
 # -------- 基本 helpers --------
 
-def is_hidden_rel(rel_parts: Tuple[str, ...]) -> bool:
+def is_hidden_name(name: str) -> bool:
+    """
+    パス 1 要素（ファイル名/フォルダ名）が '.' 始まり（hidden）か判定（UNIX慣習）。
+
+    Notes
+    -----
+    - 走査側で「隠しの子には降りない」ようにすれば、祖先は必ず非隠しなので
+      各ディレクトリで相対パス全体（is_hidden_rel）を見直す必要はない（O(1)）。
+
+    ---- Usage (for AI/LLM) -----------------------------------
+    • 例:
+        >>> is_hidden_name(".git")
+        True
+        >>> is_hidden_name("reports")
+        False
+    -----------------------------------------------------------
+    """
+    return name[:1] == "."
+
+
+def is_hidden_rel(rel_parts: "Tuple[str, ...] | str") -> bool:
     """
     相対パス要素に '.' 始まり（hidden）が含まれるか判定（UNIX慣習）。
 
     Parameters
     ----------
-    rel_parts : tuple[str, ...]
-        例: ROOT/foo/bar -> ("foo", "bar")
+    rel_parts : tuple[str, ...] | str
+        例: ROOT/foo/bar -> ("foo", "bar")、または相対パス文字列 "foo/bar"
 
     Returns
     -------
     bool
-        どれかが '.' 始まりなら True。
+        どれかが '.' 始まりなら True（'.' / '..' そのものは隠し扱いしない）。
 
     Notes
     -----
     - 「隠しフォルダ（hidden directory, '.' leading）」の枝は探索対象から外す
       かどうかの判定に使う軽量ヘルパ（pruning の前判定）。
+    - 文字列を渡した場合は分割せず、正規表現 1 回で「要素先頭の '.'」だけを調べる。
+    - os.path.relpath(ROOT, ROOT) == "." や "../x" のような '.' / '..' 要素は
+      カレント／親を表すだけなので hidden にしない（タプル形の () と同じく False）。
 
     ---- Usage (for AI/LLM) -----------------------------------
-    • 入力は「ROOT からの相対パーツのタプル」。os.walk 中に
-      Path(cur).relative_to(ROOT).parts として得られます。
+    • 入力は「ROOT からの相対パーツのタプル」または相対パス文字列。os.walk 中に
+      Path(cur).relative_to(ROOT).parts / os.path.relpath(cur, ROOT) として得られます。
     • True が返れば、その枝の子孫探索を打ち切る等の制御に利用可能。
     • 例:
         >>> is_hidden_rel(("normal", ".git", "objects"))
         True
         >>> is_hidden_rel(("documents", "reports"))
         False
+        >>> is_hidden_rel("normal/.git/objects")
+        True
+        >>> is_hidden_rel(".")
+        False
+        >>> is_hidden_rel("../x")
+        False
+        >>> is_hidden_rel(("..", "x"))
+        False
     -----------------------------------------------------------
     """
-    return any(p.startswith(".") for p in rel_parts)
+    if isinstance(rel_parts, str):
+        return "." in rel_parts and _HIDDEN_REL_RE.search(rel_parts) is not None
+    return any(p[:1] == "." and p not in _DOT_PARTS for p in rel_parts)
+
+
+_DOT_PARTS = (".", "..")
+
+# 相対パス文字列中の「'.' 始まりの要素（'.' / '..' は除く）」。
+# 区切り文字は Windows では '\\' と '/' の両方、POSIX では '/' のみ。
+_SEP_CLASS = "".join(re.escape(c) for c in dict.fromkeys((os.sep, "/")))
+_HIDDEN_REL_RE = re.compile(rf"(?:^|[{_SEP_CLASS}])\.(?!\.?(?:[{_SEP_CLASS}]|$))")
 
 
 def safe_stat_mtime(p: Path) -> float:
@@ -202,11 +270,33 @@ def safe_stat_mtime(p: Path) -> float:
     -----------------------------------------------------------
     """
     try:
-        return float(p.stat().st_mtime)
+        return os.stat(p).st_mtime
     except Exception:
         return 0.0
 
 
+def safe_stat_mtime_ns(p: "str | os.PathLike[str]", *, follow_symlinks: bool = True) -> int:
+    """
+    パス p の mtime を整数ナノ秒（st_mtime_ns）で例外安全に取得。失敗時は 0。
+
+    Notes
+    -----
+    - float 変換を挟まないため、比較・重複判定・キャッシュキーに正確に使える。
+    - os.DirEntry を持っている場合は entry.stat().st_mtime_ns を直接使う方が速い
+      （scandir のキャッシュを再利用できる）。
+
+    ---- Usage (for AI/LLM) -----------------------------------
+    • 例:
+        >>> safe_stat_mtime_ns("/does/not/exist")
+        0
+    -----------------------------------------------------------
+    """
+    try:
+        return os.stat(p, follow_symlinks=follow_symlinks).st_mtime_ns
+    except Exception:
+        return 0
+
+
 def listdir_counts(p: Path) -> Tuple[int, int]:
     """
     ディレクトリ p の直下（非再帰）の files/dirs 件数をカウント。
@@ -234,21 +324,26 @@ def listdir_counts(p: Path) -> Tuple[int, int]:
         True
     -----------------------------------------------------------
     """
-    files = dirs = 0
     try:
         with os.scandir(p) as it:
-            for e in it:
-                try:
-                    if e.is_symlink():
-                        continue
-                    if e.is_dir():
-                        dirs += 1
-                    elif e.is_file():
-                        files += 1
-                except Exception:
-                    continue
+            return _count_entries(it)
     except Exception:
-        pass
+        return 0, 0
+
+
+def _count_entries(entries: Iterable[os.DirEntry]) -> Tuple[int, int]:
+    """DirEntry 列から (files, dirs) を数える（symlink 除外）。scandir 済みの一覧を再利用する用。"""
+    files = dirs = 0
+    for e in entries:
+        try:
+            if e.is_symlink():
+                continue
+            if e.is_dir():
+                dirs += 1
+            elif e.is_file():
+                files += 1
+        except Exception:
+            continue
     return files, dirs
 
 
@@ -273,8 +368,8 @@ def iter_dirs(root: Path, max_depth: int, *, ignore_hidden: bool = True) -> Iter
 
     Notes
     -----
-    - os.walk(topdown=True, followlinks=False) を使用。
-    - dirs[:] への代入で子探索を in-place pruning。
+    - os.scandir の明示スタックで深さ制限付きに走査（os.walk(topdown=True) と同順）。
+      max_depth を超える枝は scandir しない（os.walk のように先まで読んでから捨てない）。
     - シンボリックリンクは追跡しない。
 
     ---- Usage (for AI/LLM) -----------------------------------
@@ -285,28 +380,32 @@ def iter_dirs(root: Path, max_depth: int, *, ignore_hidden: bool = True) -> Iter
         [...]
     -----------------------------------------------------------
     """
-    if not root.exists():
-        return
-    for cur, dirs, files in os.walk(root, topdown=True, followlinks=False):
-        cur_path = Path(cur)
-        rel_parts = cur_path.relative_to(root).parts if cur_path != root else ()
-        depth = 0 if cur_path == root else len(rel_parts)
-
-        if ignore_hidden and rel_parts and is_hidden_rel(rel_parts):
-            dirs[:] = []
+    # 明示スタックの前順走査（os.walk(topdown=True) と同順）。
+    # depth == max_depth のフォルダは scandir せず、それより深い枝には一切触れない。
+    stack: List[Tuple[str, int]] = [(os.fspath(root), 0)]
+    while stack:
+        cur, depth = stack.pop()
+        if depth:
+            yield Path(cur)
+        if depth >= max_depth:
             continue
+        try:
+            with os.scandir(cur) as it:
+                children = [
+                    e.path for e in it
+                    if not (ignore_hidden and is_hidden_name(e.name)) and _is_real_dir(e)
+                ]
+        except OSError:
+            continue
+        stack.extend((c, depth + 1) for c in reversed(children))
 
-        pruned = []
-        for d in dirs:
-            if ignore_hidden and d.startswith("."):
-                continue
-            child_rel_depth = (0 if cur_path == root else len(rel_parts)) + 1
-            if child_rel_depth <= max_depth:
-                pruned.append(d)
-        dirs[:] = pruned
 
-        if cur_path != root and 1 <= depth <= max_depth:
-            yield cur_path
+def _is_real_dir(e: os.DirEntry) -> bool:
+    """symlink でない実ディレクトリか（d_type を使うので通常は stat 不要）。"""
+    try:
+        return e.is_dir(follow_symlinks=False)
+    except OSError:
+        return False
 
 
 def ext_key(path: Path) -> str:
@@ -337,12 +436,112 @@ def ext_key(path: Path) -> str:
         '<none>'
     -----------------------------------------------------------
     """
-    s = path.suffix.lower()
-    return s if s else "<none>"
+    return _ext_key_name(path.name)
+
+
+def _safe_stat(p: "Path | os.DirEntry") -> "os.stat_result | None":
+    """
+    p.stat() を 1 回だけ呼び、失敗（消失・権限など）なら None を返す。
+    mtime と size を同じ stat 結果から読むためのヘルパ（exists()+stat() の二重呼び出しを避ける）。
+    Path / os.DirEntry のどちらも受け付ける（DirEntry はキャッシュ済みの stat を使える）。
+    """
+    try:
+        return p.stat()
+    except OSError:
+        return None
+
+
+def _ext_key_name(name: str) -> str:
+    """
+    ファイル名（str）から ext_key と同じ正規化拡張子を返す（Path を生成しない高速版）。
+    判定規則は pathlib.PurePath.suffix に合わせる（先頭ドットのみ・末尾ドットは拡張子なし）。
+    """
+    i = name.rfind(".")
+    if not 0 < i < len(name) - 1:
+        return "<none>"
+    raw = name[i:]
+    ext = _EXT_CACHE.get(raw)
+    if ext is None:
+        # 同じ拡張子は同一の str オブジェクトを共有（行データ・集計キーで使い回す）
+        ext = raw.lower()
+        if len(_EXT_CACHE) < _EXT_CACHE_MAX:
+            ext = _EXT_CACHE.setdefault(ext, ext)  # 正規形自身も登録しておく
+            _EXT_CACHE[raw] = ext
+    return ext
+
+
+# 生の拡張子（'.PDF' など）→ 正規化済み拡張子（'.pdf'）。件数が異常に多い場合に備えて上限付き。
+_EXT_CACHE: Dict[str, str] = {}
+_EXT_CACHE_MAX = 4096
 
 
 # -------- 上位ユーティリティ：ページの主処理を関数化 --------
 
+class DirRow(NamedTuple):
+    """walk_tree_collect(as_tuples=True) のフォルダ行（modified だけ modified_ts: float）。"""
+    kind: str
+    path: str
+    name: str
+    depth: int
+    parent: str
+    modified_ts: float
+    files_direct: Optional[int]
+    dirs_direct: Optional[int]
+
+    @property
+    def modified(self) -> Optional[dt.datetime]:
+        """modified_ts を datetime に変換（0.0 は None）。"""
+        return _fromtimestamp(self.modified_ts) if self.modified_ts else None
+
+
+class FileRow(NamedTuple):
+    """walk_tree_collect(as_tuples=True) のファイル行（modified だけ modified_ts: float）。"""
+    kind: str
+    path: str
+    name: str
+    depth: int
+    parent: str
+    modified_ts: float
+    size_bytes: Optional[int]
+    ext: str
+
+    @property
+    def modified(self) -> Optional[dt.datetime]:
+        """modified_ts を datetime に変換（0.0 は None）。"""
+        return _fromtimestamp(self.modified_ts) if self.modified_ts else None
+
+
+_fromtimestamp = dt.datetime.fromtimestamp
+
+
+def _dir_dict(kind, path, name, depth, parent, mtime, files_direct, dirs_direct) -> Dict[str, Any]:
+    """DirRow と同じ並びの引数から従来スキーマの dict 行を作る（modified は datetime|None）。"""
+    return {
+        "kind": kind,
+        "path": path,
+        "name": name,
+        "depth": depth,
+        "parent": parent,
+        "modified": _fromtimestamp(mtime) if mtime else None,
+        "files_direct": files_direct,
+        "dirs_direct": dirs_direct,
+    }
+
+
+def _file_dict(kind, path, name, depth, parent, mtime, size_bytes, ext) -> Dict[str, Any]:
+    """FileRow と同じ並びの引数から従来スキーマの dict 行を作る（modified は datetime|None）。"""
+    return {
+        "kind": kind,
+        "path": path,
+        "name": name,
+        "depth": depth,
+        "parent": parent,
+        "modified": _fromtimestamp(mtime) if mtime else None,
+        "size_bytes": size_bytes,
+        "ext": ext,
+    }
+
+
 def walk_tree_collect(
     base_root: Path,
     *,
@@ -351,7 +550,8 @@ def walk_tree_collect(
     name_filter: str = "",
     compute_counts: bool = False,
     max_rows_total: int = 10_000,
-) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Dict[str, int], int, int]:
+    as_tuples: bool = False,
+) -> Tuple[List[Any], List[Any], Dict[str, int], int, int]:
     """
     ディレクトリ/ファイルを走査し、ページ表示に必要な構造を一括生成する。
     ・深さ制御、隠しフォルダ pruning、名前の部分一致フィルタ、
@@ -371,6 +571,9 @@ def walk_tree_collect(
         True の場合、各フォルダの直下件数（files/dirs, 非再帰）を計算。
     max_rows_total : int, default 10000
         フォルダ+ファイル出力の総上限（到達で早期停止）。
+    as_tuples : bool, default False
+        True の場合、行を dict ではなく DirRow / FileRow（NamedTuple）で返す。
+        このとき modified の代わりに modified_ts（float）を持つ。
 
     Returns
     -------
@@ -392,7 +595,7 @@ def walk_tree_collect(
         - depth: 親フォルダの深さ（int）
         - parent: 親の相対パス（str, ルート直下は ""）
         - modified: datetime | None
-        - size_bytes: int | None（存在確認のうえ取得）
+        - size_bytes: int | None（stat に失敗した場合は None）
         - ext: 正規化拡張子（'.pdf' など。無しは '<none>'）
     filetype_counts : dict[str, int]
         拡張子（ext_key）→ 件数（int）の集計結果。
@@ -403,9 +606,12 @@ def walk_tree_collect(
 
     Notes
     -----
-    - os.walk(topdown=True, followlinks=False) を使用。symlink は追跡しない。
+    - os.scandir による明示スタック走査（os.walk(topdown=True) と同じ前順）。
+      symlink は追跡しない。Path は生成せず、DirEntry のキャッシュ済み種別を使う。
     - 隠しフォルダ配下の探索を完全に切ることで負荷を抑制。
     - name_filter はフォルダ名・ファイル名の双方に適用。
+    - 大量行では as_tuples=True（1 行あたりのメモリが約半分、更新日時は float のまま返すので
+      datetime を行ごとに作らず pandas で列単位に変換できる）。
 
     ---- Usage (for AI/LLM) -----------------------------------
     • 典型フロー（UI 側）:
@@ -430,77 +636,91 @@ def walk_tree_collect(
         - compute_counts=True は I/O が増えるため必要時のみ推奨。
     -----------------------------------------------------------
     """
-    name_q = (name_filter or "").lower()
-    rows_dirs: List[Dict[str, Any]] = []
-    rows_files: List[Dict[str, Any]] = []
-    filetype_counts: Dict[str, int] = {}
+    # 名前フィルタ: 空なら None（判定コストなし）。あれば大小無視の部分一致を
+    # 事前コンパイルした re（C 実装）で行い、エントリごとの .lower() の文字列生成を省く。
+    match_name = re.compile(re.escape(name_filter), re.IGNORECASE).search if name_filter else None
+    # 行の組み立て（DirRow / FileRow と dict 版は同じ並びの引数を取る）
+    make_dir, make_file = (DirRow, FileRow) if as_tuples else (_dir_dict, _file_dict)
+    rows_dirs: List[Any] = []
+    rows_files: List[Any] = []
+    filetype_counts: Dict[str, int] = defaultdict(int)
     total_rows = 0
     max_depth_found = 0
 
-    for cur, dirs, files in os.walk(base_root, topdown=True, followlinks=False):
-        cur_path = Path(cur)
-        rel_parts = cur_path.relative_to(base_root).parts if cur_path != base_root else ()
-        depth = 0 if cur_path == base_root else len(rel_parts)
-
-        # prune hidden subtree
-        if ignore_hidden and rel_parts and any(p.startswith(".") for p in rel_parts):
-            dirs[:] = []
-            continue
-
-        # prune by depth + hidden child
-        pruned = []
-        for d in dirs:
-            if ignore_hidden and d.startswith("."):
-                continue
-            child_depth = (0 if cur_path == base_root else len(rel_parts)) + 1
-            if child_depth <= max_depth:
-                pruned.append(d)
-        dirs[:] = pruned
+    # 明示スタックによる前順（pre-order）走査。os.walk(topdown=True) と同じ順序で行を生成する。
+    #   要素: (絶対パス, base_root からの相対パス, 深さ, 親の相対パス, DirEntry|None)
+    stack: List[Tuple[str, str, int, str, Any]] = [(os.fspath(base_root), "", 0, "", None)]
+    while stack:
+        cur, rel, depth, parent_rel, cur_entry = stack.pop()
+        try:
+            with os.scandir(cur) as it:
+                entries = list(it)
+        except OSError:
+            continue  # os.walk と同様、読めないフォルダは行も出さない
 
         # dir row (exclude base_root)
-        if cur_path != base_root and 1 <= depth <= max_depth:
-            name = cur_path.name
-            if (not name_q) or (name_q in name.lower()):
-                mtime = safe_stat_mtime(cur_path)
-                files_cnt, dirs_cnt = listdir_counts(cur_path) if compute_counts else (None, None)
+        if cur_entry is not None:
+            name = cur_entry.name
+            if match_name is None or match_name(name):
+                dst = _safe_stat(cur_entry)
+                mtime = dst.st_mtime if dst is not None else 0.0
+                # 直下件数は、いま scandir した entries をそのまま数える（再 scandir しない）
+                files_cnt, dirs_cnt = _count_entries(entries) if compute_counts else (None, None)
                 rows_dirs.append(
-                    {
-                        "kind": "dir",
-                        "path": str(cur_path.relative_to(base_root)),
-                        "name": name,
-                        "depth": depth,
-                        "parent": "" if cur_path.parent == base_root else str(cur_path.parent.relative_to(base_root)),
-                        "modified": dt.datetime.fromtimestamp(mtime) if mtime else None,
-                        "files_direct": files_cnt,
-                        "dirs_direct": dirs_cnt,
-                    }
+                    make_dir(
+                        "dir",
+                        rel,
+                        name,
+                        depth,
+                        parent_rel,
+                        mtime,
+                        files_cnt,
+                        dirs_cnt,
+                    )
                 )
                 total_rows += 1
                 max_depth_found = max(max_depth_found, depth)
                 if total_rows >= max_rows_total:
                     break
 
-        # file rows
-        for fname in files:
-            if ignore_hidden and fname.startswith("."):
+        child_depth = depth + 1
+        subdirs: List[Any] = []
+        for e in entries:
+            fname = e.name
+            try:
+                is_dir = e.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                # symlink のフォルダは辿らない（followlinks=False 相当）。隠し・深さ超過は prune。
+                # 子の名前だけ判定すれば、積まれたフォルダの祖先は常に非隠しになる。
+                if ignore_hidden and is_hidden_name(fname):
+                    continue
+                if child_depth <= max_depth and not e.is_symlink():
+                    subdirs.append(e)
+                continue
+
+            # file row
+            if ignore_hidden and is_hidden_name(fname):
                 continue
-            if name_q and (name_q not in fname.lower()):
+            if match_name is not None and not match_name(fname):
                 continue
-            fpath = cur_path / fname
-            mtime = safe_stat_mtime(fpath)
-            ex = ext_key(fpath)
-            filetype_counts[ex] = filetype_counts.get(ex, 0) + 1
+            # mtime と size は同じ stat 結果から読む（stat は 1 ファイル 1 回）
+            fst = _safe_stat(e)
+            mtime, size = (fst.st_mtime, fst.st_size) if fst is not None else (0.0, None)
+            ex = _ext_key_name(fname)
+            filetype_counts[ex] += 1
             rows_files.append(
-                {
-                    "kind": "file",
-                    "path": str(fpath.relative_to(base_root)),
-                    "name": fname,
-                    "depth": depth,
-                    "parent": "" if cur_path == base_root else str(cur_path.relative_to(base_root)),
-                    "modified": dt.datetime.fromtimestamp(mtime) if mtime else None,
-                    "size_bytes": fpath.stat().st_size if fpath.exists() else None,
-                    "ext": ex,
-                }
+                make_file(
+                    "file",
+                    f"{rel}{os.sep}{fname}" if rel else fname,
+                    fname,
+                    depth,
+                    rel,
+                    mtime,
+                    size,
+                    ex,
+                )
             )
             total_rows += 1
             max_depth_found = max(max_depth_found, depth)
@@ -510,4 +730,9 @@ def walk_tree_collect(
         if total_rows >= max_rows_total:
             break
 
-    return rows_dirs, rows_files, filetype_counts, total_rows, max_depth_found
+        # 子フォルダは列挙順に訪問するため逆順で積む
+        for e in reversed(subdirs):
+            child_rel = f"{rel}{os.sep}{e.name}" if rel else e.name
+            stack.append((e.path, child_rel, child_depth, rel, e))
+
+    return rows_dirs, rows_files, dict(filetype_counts), total_rows, max_depth_found
@@ -8,7 +8,7 @@ PDF ユーティリティの公開 API を一箇所に集約した“ファサ
 
 主な関数（抜粋）:
 - quick_pdf_info
-- run_ocr
+- run_ocr, run_ocr_batch, OcrWorker
 - extract_text_pdf, analyze_pdf_texts, write_text_file
 - analyze_pdf_images, extract_embedded_images
 - render_thumb_png, read_pdf_bytes, read_pdf_b64
@@ -17,7 +17,7 @@ PDF ユーティリティの公開 API を一箇所に集約した“ファサ
 
 from .paths import rel_from, iter_pdfs, make_converted_path, make_text_path
 from .info import quick_pdf_info
-from .ocr import run_ocr
+from .ocr import run_ocr, run_ocr_batch, OcrWorker
 from .text import extract_text_pdf, write_text_file, analyze_pdf_texts
 from .images import analyze_pdf_images, extract_embedded_images
 from .io import render_thumb_png, read_pdf_bytes, read_pdf_b64
@@ -26,7 +26,7 @@ from .sysenv import env_checks
 __all__ = [
     "rel_from", "iter_pdfs", "make_converted_path", "make_text_path",
     "quick_pdf_info",
-    "run_ocr",
+    "run_ocr", "run_ocr_batch", "OcrWorker",
     "extract_text_pdf", "write_text_file", "analyze_pdf_texts",
     "analyze_pdf_images", "extract_embedded_images",
     "render_thumb_png", "read_pdf_bytes", "read_pdf_b64",
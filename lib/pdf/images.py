@@ -1,7 +1,7 @@
 """
 lib/pdf/images.py
 =================================
-PDF の埋め込み画像（XObject）解析と、画像の抽出（PNG）＋ ZIP 作成。
+PDF の埋め込み画像（XObject）解析と、画像の抽出（PNG / JPEG）＋ ZIP 作成。
 
 機能概要
 --------
@@ -21,8 +21,8 @@ Tips
 - analyze_pdf_images(pdf_path, mtime_ns, mode="all", sample_pages=6) -> dict  
     PDF 内の埋め込み画像の構造を解析し、フォーマット・件数などを要約。
 
-- extract_embedded_images(pdf_path, img_index, mode="xobject", dpi=144) -> dict  
-    埋め込み画像を抽出し、PNG として ZIP に格納して返す。
+- extract_embedded_images(pdf_path, img_index, mode="xobject", dpi=144, compress=False) -> dict  
+    埋め込み画像を抽出し、PNG（パススルー時は元の JPEG）として ZIP に格納して返す。
 
 公開関数一覧（ChatGPT向けクイックリファレンス）
 --------------------------------------------
@@ -68,9 +68,9 @@ info = analyze_pdf_images(str(p), p.stat().st_mtime_ns, mode="sample", sample_pa
 top = sorted(info["formats_count"].items(), key=lambda x: x[1], reverse=True)[:3]
 print("total_images:", info["total_images"], "top_formats:", top)
 
-関数2：埋め込み画像の抽出（PNG & ZIP）
-- extract_embedded_images(pdf_path: str, img_index: dict, mode: str = "xobject", dpi: int = 144) -> dict
-  `analyze_pdf_images()` の出力 `img_index` をもとに、ページごとに画像を PNG 化して ZIP に格納して返す。
+関数2：埋め込み画像の抽出（PNG / JPEG & ZIP）
+- extract_embedded_images(pdf_path: str, img_index: dict, mode: str = "xobject", dpi: int = 144, compress: bool = False) -> dict
+  `analyze_pdf_images()` の出力 `img_index` をもとに、ページごとに画像を PNG 化（パススルー時は元の JPEG のまま）して ZIP に格納して返す。
 
 引数
 - pdf_path : str | Path
@@ -79,15 +79,19 @@ print("total_images:", info["total_images"], "top_formats:", top)
     `analyze_pdf_images()` の戻り値（内部の pages[].xrefs / smasks を利用）。
 - mode : {"xobject", "resample"} = "xobject"
     - "xobject"  : 真の埋め込み画像データを PNG 正規化（SMask 合成＆色空間正規化あり）
+                   SMask なし・グレー/RGB の PNG/JPEG は元データをそのまま格納（JPEG は .jpg）
     - "resample" : ページ上の描画矩形ごとにレンダリングして切り出し（全矩形取得、なければ xobject にフォールバック）
 - dpi : int = 144
     "resample" のレンダリング解像度。
+- compress : bool = False
+    False なら ZIP へ無圧縮（ZIP_STORED）で格納、True なら ZIP_DEFLATED（compresslevel=1）。
+    PNG は内部で既に DEFLATE 圧縮済みのため、再圧縮してもサイズはほぼ縮まない。
 
 戻り値（dict スキーマ）
 - pages : list[dict]
     - page   : int
     - images : list[dict]
-        - bytes    : bytes     # PNG バイナリ（空なら抽出失敗）
+        - bytes    : bytes     # PNG（パススルー時は JPEG）バイナリ（空なら抽出失敗）
         - label    : str       # 情報ラベル（例: "XObject 1024×768（123.4 KB）"）
         - filename : str       # ZIP 内に格納したファイル名
 - zip_bytes : bytes           # 生成した ZIP ファイルのバイナリ
@@ -116,29 +120,44 @@ st.download_button("🗜 画像ZIPをダウンロード", data=out["zip_bytes"],
 
 実装上の注意
 - PyMuPDF（fitz）に依存。色空間が多チャンネル（CMYK 等）の場合は RGB 正規化、SMask は合成済みで PNG 生成。
+- "xobject" の `bytes` は PNG とは限らない（元データが JPEG なら JPEG のまま）。MIME は `filename` の拡張子で判定すること。
 - "resample" は `page.get_image_rects(xref)` の全矩形を DPI 指定で切り出すため、枚数が増える場合があります。
+  ページ全体は 1 回だけレンダリングし、各矩形はその画素から切り出します。
 - 形式抽出に失敗した画像は "bin" としてカウントされます。
+- ZIP は既定で無圧縮（PNG の再圧縮に CPU を使わない）。
 
 """
 
 
 from __future__ import annotations
 from typing import Dict, Any, List
+from collections import Counter
 import io
 import zipfile
 from .cache import cache_data
 
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # 未導入でも import 自体は通す（呼び出し時に失敗）
+    fitz = None  # type: ignore[assignment]
+
 __all__ = ["analyze_pdf_images", "extract_embedded_images"]
 
+# 元データをそのまま書き出せる形式（extract_image の ext → ZIP 内の拡張子）
+_PASSTHROUGH_EXT = {"png": "png", "jpeg": "jpg", "jpg": "jpg"}
+
 
 def _human_size(n: int) -> str:
     """人間に読みやすい単位のサイズ表記（B/KB/MB/…）。"""
-    units = ["B", "KB", "MB", "GB", "TB"]
-    size = float(n)
-    for u in units:
-        if size < 1024 or u == units[-1]:
-            return f"{size:.0f} {u}" if u == "B" else f"{size:.1f} {u}"
-        size /= 1024
+    n = int(n)
+    if n < 1024:
+        return f"{n} B"
+    # 1024 の何乗かは bit_length から直接求める（割り算ループ不要）
+    i = min((n.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{n / (1 << (10 * i)):.1f} {_SIZE_UNITS[i]}"
+
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 
 @cache_data()(show_spinner=True)
@@ -149,9 +168,6 @@ def analyze_pdf_images(
     sample_pages: int = 6
 ) -> Dict[str, Any]:
     """埋め込み画像の構造を解析し、ページごとに要約する。"""
-    import fitz
-    from collections import Counter
-
     doc = fitz.open(pdf_path)
     try:
         total_pages = doc.page_count
@@ -162,6 +178,9 @@ def analyze_pdf_images(
         pages_info: List[Dict[str, Any]] = []
         formats_all: List[str] = []
         total_images = 0
+        # 同じ XObject（ロゴ・スタンプ等）は多数のページで再利用されるため、
+        # xref ごとに形式判定（extract_image は画像データ全体を取り出す重い処理）を 1 回だけ行う
+        ext_by_xref: Dict[int, str] = {}
 
         for i in page_range:
             page = doc.load_page(i)
@@ -169,10 +188,13 @@ def analyze_pdf_images(
             fmts, xrefs, smasks = [], [], []
             for im in images:
                 xref, smask = im[0], im[1]
-                try:
-                    ext = (doc.extract_image(xref).get("ext") or "bin").lower()
-                except Exception:
-                    ext = "bin"
+                ext = ext_by_xref.get(xref)
+                if ext is None:
+                    try:
+                        ext = (doc.extract_image(xref).get("ext") or "bin").lower()
+                    except Exception:
+                        ext = "bin"
+                    ext_by_xref[xref] = ext
                 fmts.append(ext)
                 xrefs.append(xref)
                 smasks.append(smask)
@@ -191,24 +213,47 @@ def analyze_pdf_images(
         doc.close()
 
 
-def _export_xobject_png(doc, xref: int, smask: int):
-    """XObject（真の埋め込み画像）を PNG(RGB/RGBA) に正規化して返す。"""
-    import fitz
+def _export_xobject_image(doc, xref: int, smask: int):
+    """XObject（真の埋め込み画像）を画像バイナリとして返す。
+
+    SMask なし・グレー/RGB の PNG/JPEG は再エンコードせず元データをそのまま返し、
+    それ以外は PNG(RGB/RGBA) に正規化する。
+    戻り値は (bytes, width, height, ext)。ext は "png" または "jpg" で、bytes の形式を表す。
+    """
+    if not smask:
+        try:
+            info = doc.extract_image(xref)
+        except Exception:
+            info = None
+        if info and info.get("colorspace") in (1, 3):
+            ext = (info.get("ext") or "").lower()
+            if ext in _PASSTHROUGH_EXT:
+                return info["image"], info["width"], info["height"], _PASSTHROUGH_EXT[ext]
+
     pix = fitz.Pixmap(doc, xref)
-    # 多チャンネル（CMYK 等）→ RGB
-    if pix.n > 4 and pix.alpha == 0:
+    # 多チャンネル（CMYK 等）→ RGB（pix.n はアルファ込みなので色成分数で判定）
+    if pix.colorspace and pix.colorspace.n > 3:
         pix = fitz.Pixmap(fitz.csRGB, pix)
     # SMask 合成（アルファ）
     if smask and smask > 0:
         m = fitz.Pixmap(doc, smask)
         pix = fitz.Pixmap(pix, m)
-    return pix.tobytes("png"), pix.width, pix.height
+    return pix.tobytes("png"), pix.width, pix.height, "png"
 
 
-def _export_resampled_png(page, rect, dpi: int):
-    """ページ上の矩形 `rect` を DPI 指定でレンダリングして PNG へ。"""
-    import fitz
+def _export_resampled_png(page, rect, dpi: int, full_pm=None):
+    """ページ上の矩形 `rect` を DPI 指定でレンダリングして PNG へ。
+
+    `full_pm`（同じ DPI でレンダリング済みのページ全体、回転なしページのみ）を渡すと、
+    ページを再ラスタライズせずにその画素から矩形を切り出す。
+    """
     mat = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+    if full_pm is not None:
+        irect = (rect * mat).irect & full_pm.irect
+        if not irect.is_empty:
+            pm = fitz.Pixmap(full_pm.colorspace, irect, False)
+            pm.copy(full_pm, irect)
+            return pm.tobytes("png"), pm.width, pm.height
     pm = page.get_pixmap(clip=rect, matrix=mat, alpha=False)
     return pm.tobytes("png"), pm.width, pm.height
 
@@ -217,7 +262,8 @@ def extract_embedded_images(
     pdf_path,
     img_index: Dict[str, Any],
     mode: str = "xobject",
-    dpi: int = 144
+    dpi: int = 144,
+    compress: bool = False
 ) -> Dict[str, Any]:
     """埋め込み画像を抽出し、ZIP（メモリ）に格納して返す。
 
@@ -226,16 +272,21 @@ def extract_embedded_images(
     img_index : dict
         `analyze_pdf_images()` の結果。各ページの xref / smask を使用。
     mode : {"xobject","resample"}
-        - "xobject"   : 埋め込み画像データをそのまま PNG 正規化
+        - "xobject"   : 埋め込み画像データを PNG 正規化（PNG/JPEG は元データのまま。形式は filename の拡張子）
         - "resample"  : ページ見た目サイズの矩形を全て切出し（なければ xobject にフォールバック）
     dpi : int
         再サンプリング時のレンダリング DPI
+    compress : bool
+        True なら ZIP_DEFLATED（compresslevel=1）、False なら ZIP_STORED（既定）
     """
-    import fitz
     doc = fitz.open(str(pdf_path))
     pages_out: List[Dict[str, Any]] = []
     zip_buf = io.BytesIO()
-    zf = zipfile.ZipFile(zip_buf, "w", compression=zipfile.ZIP_DEFLATED)
+    # PNG は既に DEFLATE 済みなので、既定では再圧縮せずそのまま格納する
+    if compress:
+        zf = zipfile.ZipFile(zip_buf, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+    else:
+        zf = zipfile.ZipFile(zip_buf, "w", compression=zipfile.ZIP_STORED)
 
     try:
         for row in img_index.get("pages", []):
@@ -245,6 +296,7 @@ def extract_embedded_images(
             page = doc.load_page(pno - 1)
             smasks = row.get("smasks", [0] * len(row.get("xrefs", [])))
             imgs: List[Dict[str, Any]] = []
+            full_pm = None  # resample 用：ページ全体のレンダリング（最初の矩形で 1 回だけ作る）
 
             for idx_in_page, (xref, smask) in enumerate(zip(row.get("xrefs", []), smasks), start=1):
                 try:
@@ -254,8 +306,10 @@ def extract_embedded_images(
                         except Exception:
                             rects = []
                         if rects:
+                            if full_pm is None and page.rotation == 0:
+                                full_pm = page.get_pixmap(matrix=fitz.Matrix(dpi / 72.0, dpi / 72.0), alpha=False)
                             for rep_idx, r in enumerate(rects, start=1):
-                                png_bytes, w, h = _export_resampled_png(page, r, dpi)
+                                png_bytes, w, h = _export_resampled_png(page, r, dpi, full_pm)
                                 label = f"切出し {w}×{h}（{_human_size(len(png_bytes))}）"
                                 fname = f"p{pno:03d}_img{idx_in_page:02d}_rep{rep_idx}_x{xref}.png"
                                 imgs.append({"bytes": png_bytes, "label": label, "filename": fname})
@@ -263,11 +317,11 @@ def extract_embedded_images(
                             continue  # 次の xref へ
 
                     # xobject or fallback
-                    png_bytes, w, h = _export_xobject_png(doc, xref, smask)
-                    label = f"XObject {w}×{h}（{_human_size(len(png_bytes))}）"
-                    fname = f"p{pno:03d}_img{idx_in_page:02d}_x{xref}.png"
-                    imgs.append({"bytes": png_bytes, "label": label, "filename": fname})
-                    zf.writestr(fname, png_bytes)
+                    img_bytes, w, h, ext = _export_xobject_image(doc, xref, smask)
+                    label = f"XObject {w}×{h}（{_human_size(len(img_bytes))}）"
+                    fname = f"p{pno:03d}_img{idx_in_page:02d}_x{xref}.{ext}"
+                    imgs.append({"bytes": img_bytes, "label": label, "filename": fname})
+                    zf.writestr(fname, img_bytes)
 
                 except Exception as e:
                     imgs.append({"bytes": b"", "label": f"画像抽出失敗: {e}", "filename": ""})
@@ -12,6 +12,7 @@ PDF の軽量解析（quick scan）。
 --------
 - PyMuPDF（fitz）で `get_text("text")` を使用。
 - 一定以上の文字数（>=20）を含むページの割合で判定。
+- 判定が確定した時点で残りのページは読まない（早期終了）。
 - キャッシュ可能（Streamlit 環境では `st.cache_data`）。
 
 公開関数一覧
@@ -48,8 +49,8 @@ PDF の軽量解析（quick scan）。
 戻り値（dict スキーマ）
 - pages       : int         # 総ページ数
 - kind        : str         # "テキストPDF" または "画像PDF"
-- text_ratio  : float       # テキスト有りページ / チェックページ数
-- checked     : int         # 実際に検査したページ数（min(sample_pages, pages)）
+- text_ratio  : float       # テキスト有りページ / checked
+- checked     : int         # 実際に検査したページ数（最大 min(sample_pages, pages)。早期終了時はそれ未満）
 
 最小実行例（コピペ可）
 ------------------------------------------------
@@ -68,6 +69,8 @@ label = f"{p.name} — {kind}・📄 {pages}ページ（text_ratio={ratio:.2f}
 実装前提 / 注意
 - 内部で PyMuPDF(fitz) を使用し、`get_text("text")` の文字数 >= 20 を「テキスト有り」とみなす。
 - 例外時は `{"pages": 0, "kind": "画像PDF", "text_ratio": 0.0, "checked": 0}` を返す設計。
+- 残りページの結果に関わらず判定が変わらなくなった時点で打ち切る。
+  text_ratio は「実際に読んだページ」に対する比率（判定結果は全ページを読んだ場合と同じ）。
 - キャッシュ環境（Streamlit など）では `mtime_ns` を変えると再計算される。
 - 日本語ラベルを返すため、判定分岐は `"テキストPDF" / "画像PDF"` を前提にすること。
 """
@@ -76,6 +79,11 @@ from __future__ import annotations
 from typing import Dict, Any
 from .cache import cache_data
 
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # 未導入でも import 自体は通す（呼び出し時に失敗）
+    fitz = None  # type: ignore[assignment]
+
 __all__ = ["quick_pdf_info"]  # 公開関数を明示
 
 
@@ -104,7 +112,6 @@ def quick_pdf_info(
     dict
         {"pages": int, "kind": str, "text_ratio": float, "checked": int}
     """
-    import fitz
     try:
         doc = fitz.open(pdf_path)
     except Exception:
@@ -113,6 +120,7 @@ def quick_pdf_info(
         n = doc.page_count
         check = min(sample_pages, max(n, 1))
         text_pages = 0
+        checked = 0
         for i in range(check):
             try:
                 p = doc.load_page(i)
@@ -120,12 +128,17 @@ def quick_pdf_info(
                     text_pages += 1
             except Exception:
                 pass
-        ratio = text_pages / max(check, 1)
+            checked = i + 1
+            # 判定が確定したら打ち切る（テキストPDF確定 / 残り全部テキストでも届かない）
+            if (text_pages / check >= text_ratio_threshold
+                    or (text_pages + check - checked) / check < text_ratio_threshold):
+                break
+        ratio = text_pages / max(checked, 1)
         return {
             "pages": n,
             "kind": "テキストPDF" if ratio >= text_ratio_threshold else "画像PDF",
             "text_ratio": ratio,
-            "checked": check,
+            "checked": checked,
         }
     finally:
         doc.close()
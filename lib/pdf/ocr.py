@@ -14,11 +14,19 @@ OCRmyPDF を用いた OCR 変換。
 強化点
 ------
 - Tesseract 言語パックの存在チェックと自動フォールバック（jpn 未導入でも止まらない）
+  - 言語一覧・ocrmypdf の機能検知はプロセス内でキャッシュ（run_ocr ごとに subprocess を起動しない）
 - 低DPI/ベクタPDF対策: image_dpi / oversample
 - ページ単位のハング回避: tesseract_timeout
+- スキャン画像の無い PDF では --clean/--deskew を省略（auto_clean）
+- tessdata_fast（整数モデル）があれば既定で使用（tessdata_variant="fast"）
+- jobs > 1 では OMP_THREAD_LIMIT=1（tesseract の OpenMP スレッドと --jobs の過剰並列を防ぐ）
 - CLI フォールバックは逐次ログ読取り＋ハードタイムアウト
+  - POSIX はパイプを select で待つ。Windows（select がソケット専用）は読み取りスレッド＋キューで待つ
 - 失敗時は英語のみ（eng）で即リトライ
 - 進捗表示用の progress_cb を任意で受け取り、外部UI（Streamlit等）に伝播可能
+  - CLI ログはページ変化時＋最大 5 回/秒に間引き、ページ以外の行は verbose_log=True のときだけ流す
+- 多数ファイルは run_ocr_batch() でプロセス並列（workers × jobs ≈ CPU 数）
+- 逐次で多数ファイルを処理するなら OcrWorker（常駐プロセス）で起動コストを償却
   - 推奨: progress_cb(msg, frac)（frac=0.0〜1.0）
   - 互換: progress_cb(msg)（自動判定）
 """
@@ -26,16 +34,29 @@ OCRmyPDF を用いた OCR 変換。
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Optional, Callable, FrozenSet, Iterable, List, Tuple, Dict, Any
+from functools import lru_cache
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import math
+import multiprocessing as mp
+import codecs
+import io
+import json
 import os
+import queue
+import select
 import shutil
+import signal
 import subprocess
+import sys
 import time
 import shlex
-import inspect
 import re
+import threading
+import weakref
 
-__all__ = ["run_ocr"]
+__all__ = ["run_ocr", "run_ocr_batch", "OcrWorker"]
 
 # ============================================================
 # progress callback（互換）
@@ -46,14 +67,47 @@ __all__ = ["run_ocr"]
 ProgressCB = Optional[Callable[..., None]]  # 1引数/2引数どちらでも許容
 
 
+# callback ごとの位置引数の数（inspect.signature は重いので 1 回だけ調べて覚える）
+_CB_ARITY_CACHE: weakref.WeakKeyDictionary[Callable[..., None], int] = weakref.WeakKeyDictionary()
+_CB_ARITY_BY_ID: Dict[int, Tuple[Any, int]] = {}  # weakref 不可な callable 用（上限で clear）
+_CB_ARITY_BY_ID_MAX = 64
+
+
+def _callback_arity(cb: Callable[..., None]) -> int:
+    """位置引数の数を返す。シグネチャが取れない場合は -1（呼び出し側で総当たり）"""
+    try:
+        return _CB_ARITY_CACHE[cb]
+    except (KeyError, TypeError):
+        pass
+    hit = _CB_ARITY_BY_ID.get(id(cb))
+    if hit is not None and hit[0] is cb:
+        return hit[1]
+
+    import inspect
+    try:
+        sig = inspect.signature(cb)
+        n = len([p for p in sig.parameters.values()
+                 if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)])
+    except Exception:
+        n = -1
+    try:
+        _CB_ARITY_CACHE[cb] = n
+    except TypeError:
+        # weakref 不可 / unhashable → id で覚える（cb 自体も保持して id の再利用に備える）
+        if len(_CB_ARITY_BY_ID) >= _CB_ARITY_BY_ID_MAX:
+            _CB_ARITY_BY_ID.clear()
+        _CB_ARITY_BY_ID[id(cb)] = (cb, n)
+    return n
+
+
 def _emit_progress(cb: ProgressCB, msg: str, frac: Optional[float] = None) -> None:
     """progress_cb を安全に呼ぶ（1引数/2引数の両対応）"""
     if cb is None:
         return
     try:
-        sig = inspect.signature(cb)
-        n_params = len([p for p in sig.parameters.values()
-                        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)])
+        n_params = _callback_arity(cb)
+        if n_params < 0:
+            raise TypeError("signature unavailable")
         if n_params >= 2:
             cb(msg, frac)
         else:
@@ -72,45 +126,121 @@ def _emit_progress(cb: ProgressCB, msg: str, frac: Optional[float] = None) -> No
 # ============================================================
 # ページ進捗抽出（CLIログから cur/total を拾う）
 # ============================================================
-_PAGE_PATTERNS = [
-    re.compile(r"(?:Page|page)\s+(\d+)\s*/\s*(\d+)", re.IGNORECASE),         # "Page 3/20"
-    re.compile(r"(?:Page|page)\s+(\d+)\s+(?:of)\s+(\d+)", re.IGNORECASE),   # "Page 3 of 20"
-    re.compile(r"\b(\d+)\s*/\s*(\d+)\s+pages?\b", re.IGNORECASE),           # "3/20 pages"
-    re.compile(r"\b(\d+)\s+(?:of)\s+(\d+)\s+pages?\b", re.IGNORECASE),      # "3 of 20 pages"
-    re.compile(r"(?:processing|process)\s+(?:page)\s+(\d+)\s+(?:of)\s+(\d+)", re.IGNORECASE),
-]
+# 旧来の 5 パターンを 1 本の正規表現に統合（1 行につき re.search 1 回）:
+#   "Page 3/20" / "Page 3 of 20" / "processing page 3 of 20"  → a, b
+#   "3/20 pages" / "3 of 20 pages"                             → c, d
+_PAGE_RE = re.compile(
+    r"page\s+(?P<a>\d+)(?:\s*/\s*|\s+of\s+)(?P<b>\d+)"
+    r"|\b(?P<c>\d+)(?:\s*/\s*|\s+of\s+)(?P<d>\d+)\s+pages?\b",
+    re.IGNORECASE,
+)
 
 
 def _extract_page_progress(line: str) -> Optional[tuple[int, int]]:
     """ログ1行から (cur, total) を抽出。取れなければ None。"""
-    for pat in _PAGE_PATTERNS:
-        m = pat.search(line)
-        if m:
-            try:
-                cur = int(m.group(1))
-                total = int(m.group(2))
-                if total > 0:
-                    return cur, total
-            except Exception:
-                pass
-    return None
+    # 安い前判定：どのパターンも "/" か "of" を含むので、どちらも無い行は正規表現にかけない
+    if not line or ("/" not in line and "of" not in line.lower()):
+        return None
+    m = _PAGE_RE.search(line)
+    if m is None:
+        return None
+    if m.group("a") is not None:
+        cur, total = int(m.group("a")), int(m.group("b"))
+    else:
+        cur, total = int(m.group("c")), int(m.group("d"))
+    return (cur, total) if total > 0 else None
 
 
 # ------------------------------
 # 内部ユーティリティ
 # ------------------------------
-def _tesseract_has_lang(lang: str) -> bool:
+# TESSDATA_PREFIX 未設定時に探す tessdata の既定配置（Homebrew / 自前ビルド / Debian 系）
+_TESSDATA_DIRS = (
+    "/opt/homebrew/share/tessdata",
+    "/usr/local/share/tessdata",
+    "/usr/share/tessdata",
+    "/usr/share/tesseract-ocr/*/tessdata",
+)
+
+
+def _tessdata_dir() -> Optional[Path]:
+    """tesseract が参照する tessdata ディレクトリを推定（見つからなければ None）。"""
+    prefix = os.environ.get("TESSDATA_PREFIX")
+    if prefix:
+        # 4.x 以降は tessdata 自身、3.x はその親を指す流儀があるので両方見る
+        cands = [Path(prefix), Path(prefix) / "tessdata"]
+    else:
+        cands = []
+        for pat in _TESSDATA_DIRS:
+            if "*" in pat:  # バージョン付き（Debian）は新しい方を優先
+                cands.extend(sorted(Path("/").glob(pat.lstrip("/")), reverse=True))
+            else:
+                cands.append(Path(pat))
+    for d in cands:
+        if d.is_dir() and next(d.glob("*.traineddata"), None) is not None:
+            return d
+    return None
+
+
+@lru_cache(maxsize=1)
+def _list_tesseract_langs() -> FrozenSet[str]:
+    """
+    利用可能な tesseract 言語の一覧（1 プロセスにつき 1 回だけ求めてキャッシュ）。
+    tessdata の *.traineddata を直接列挙し（--list-langs と同じ情報源）、
+    見つからないときだけ `tesseract --list-langs` を起動する。
+    """
+    if shutil.which("tesseract"):
+        d = _tessdata_dir()
+        if d is not None:
+            langs = frozenset(p.name[:-len(".traineddata")] for p in d.glob("*.traineddata"))
+            if langs:
+                return langs
     try:
         out = subprocess.check_output(
             ["tesseract", "--list-langs"],
             text=True,
             stderr=subprocess.STDOUT
         )
-        langs = {ln.strip() for ln in out.splitlines()
-                 if ln.strip() and not ln.startswith("List of")}
-        return lang in langs
+        return frozenset(ln.strip() for ln in out.splitlines()
+                         if ln.strip() and not ln.startswith("List of"))
     except Exception:
-        return False
+        return frozenset()
+
+
+def _tesseract_has_lang(lang: str) -> bool:
+    return lang in _list_tesseract_langs()
+
+
+# tessdata_fast / tessdata_best の配置（環境変数で上書き可）
+_TESSDATA_VARIANTS = {
+    "fast": ("TESSDATA_FAST_PREFIX", (
+        "/opt/homebrew/share/tessdata_fast",
+        "/usr/local/share/tessdata_fast",
+        "/usr/share/tessdata_fast",
+    )),
+    "best": ("TESSDATA_BEST_PREFIX", (
+        "/opt/homebrew/share/tessdata_best",
+        "/usr/local/share/tessdata_best",
+        "/usr/share/tessdata_best",
+    )),
+}
+
+
+def _tessdata_variant_dir(variant: Optional[str], lang: str) -> Optional[str]:
+    """
+    "fast"/"best" の tessdata ディレクトリを返す。見つからない・lang の言語が
+    揃っていない・"default" の場合は None（TESSDATA_PREFIX は変更しない）。
+    """
+    spec = _TESSDATA_VARIANTS.get(variant or "default")
+    if spec is None:
+        return None
+    env_key, dirs = spec
+    cands = [os.environ[env_key]] if os.environ.get(env_key) else list(dirs)
+    parts = [p for p in lang.split("+") if p]
+    for d in cands:
+        if parts and all(os.path.isfile(os.path.join(d, f"{p}.traineddata")) for p in parts):
+            return d
+    return None
 
 
 def _pick_lang(requested: str) -> str:
@@ -118,15 +248,17 @@ def _pick_lang(requested: str) -> str:
     "jpn+eng" のような指定から、実在するものだけを残す。
     何も残らなければ eng（存在すれば）にフォールバック。
     """
+    langs = _list_tesseract_langs()
     parts = [p.strip() for p in (requested or "").split("+") if p.strip()]
-    avail = [p for p in parts if _tesseract_has_lang(p)]
+    avail = [p for p in parts if p in langs]
     if avail:
         return "+".join(avail)
-    return "eng" if _tesseract_has_lang("eng") else (parts[0] if parts else "eng")
+    return "eng" if "eng" in langs else (parts[0] if parts else "eng")
 
 
+@lru_cache(maxsize=1)
 def _ocrmypdf_supports_progress_bar() -> bool:
-    """ocrmypdf が --progress-bar をサポートするかを help 出力で検知。"""
+    """ocrmypdf が --progress-bar をサポートするかを help 出力で検知（結果はキャッシュ）。"""
     exe = shutil.which("ocrmypdf")
     if not exe:
         return False
@@ -137,6 +269,37 @@ def _ocrmypdf_supports_progress_bar() -> bool:
         return False
 
 
+def _clear_caches() -> None:
+    """言語一覧・--progress-bar 検知のキャッシュを破棄（言語パック追加後やテスト用）。"""
+    _list_tesseract_langs.cache_clear()
+    _ocrmypdf_supports_progress_bar.cache_clear()
+
+
+def _looks_scanned(src: Path, sample_pages: int = 4) -> bool:
+    """
+    先頭数ページに「ページの大半を覆う画像」があるか（= スキャン由来か）を軽く判定。
+    判定できないとき（PyMuPDF 無し・読み込み失敗）は True（従来どおり clean/deskew する）。
+    """
+    try:
+        import fitz  # PyMuPDF
+        doc = fitz.open(str(src))
+    except Exception:
+        return True
+    try:
+        for i in range(min(sample_pages, doc.page_count)):
+            page = doc.load_page(i)
+            area = abs(page.rect) or 1.0
+            for im in page.get_images(full=True):
+                for r in page.get_image_rects(im[0]):
+                    if abs(r & page.rect) >= 0.5 * area:
+                        return True
+        return False
+    except Exception:
+        return True
+    finally:
+        doc.close()
+
+
 # ------------------------------
 # 公開 API
 # ------------------------------
@@ -157,16 +320,35 @@ def run_ocr(
     oversample: int = 300,
     tesseract_timeout_sec: int = 60,
     hard_timeout_sec: int = 3600,
+    omp_thread_limit: Optional[int] = 1,
+    tessdata_variant: str = "fast",
+    auto_clean: bool = True,
+    worker: Optional[OcrWorker] = None,
+    verbose_log: bool = False,
 ) -> None:
     """
     OCR を実行。
 
+    omp_thread_limit : jobs > 1 のとき CLI の tesseract に渡す OMP_THREAD_LIMIT（None で設定しない）。
+        環境変数 OMP_THREAD_LIMIT が既にあればそちらを優先。Python API 経路では使わない
+        （ocrmypdf がジョブごとに tesseract のスレッドを管理するため）。
+    tessdata_variant : "fast" | "best" | "default"
+        tesseract の学習データ。"fast"（整数モデル・高速）/"best" の配置が見つかり、
+        必要な言語が揃っている場合だけ TESSDATA_PREFIX を切り替える（無ければ既定のまま）。
+    auto_clean : True なら先頭ページを見てスキャン画像が無い PDF では --clean/--deskew を省く
+        （unpaper と再レンダリングの無駄を避ける）。False なら常に付ける。
+    worker : OcrWorker を渡すと、progress_cb なしの経路（Python API）を常駐ワーカーで実行する。
+    verbose_log : True なら CLI のページ以外のログ行も progress_cb に流す（既定は Page x/y のみ）。
+
     実行順（重要）
     -------------
     - progress_cb がある → CLI（ページ進捗を出せる）を最優先
     - progress_cb がない → Python API を最優先（速い/安定）→ 失敗時は CLI
     """
     lang_eff = _pick_lang(lang)
+    omp = omp_thread_limit if int(jobs) > 1 else None
+    tessdata = _tessdata_variant_dir(tessdata_variant, lang_eff)
+    clean = _looks_scanned(src) if auto_clean else True
     _emit_progress(progress_cb, f"OCR 準備: lang={lang_eff}, optimize={optimize}, jobs={jobs}", 0.0)
 
     # ========================================================
@@ -181,12 +363,16 @@ def run_ocr(
                 optimize=optimize,
                 jobs=jobs,
                 rotate_pages=rotate_pages,
+                clean=clean,
                 sidecar_path=sidecar_path,
                 image_dpi=image_dpi,
                 oversample=oversample,
                 tesseract_timeout_sec=tesseract_timeout_sec,
                 hard_timeout_sec=hard_timeout_sec,
                 progress_cb=progress_cb,
+                verbose_log=verbose_log,
+                omp_thread_limit=omp,
+                tessdata_prefix=tessdata,
             )
             _emit_progress(progress_cb, f"[cli] done (lang={lang_eff})", 1.0)
             return
@@ -196,18 +382,23 @@ def run_ocr(
             # 英語だけで最後のリトライ
             if lang_eff != "eng" and _tesseract_has_lang("eng"):
                 _emit_progress(progress_cb, "[cli] retry with eng only…", None)
+                tessdata_eng = _tessdata_variant_dir(tessdata_variant, "eng")
                 _run_cli_streaming(
                     src, dst,
                     lang="eng",
                     optimize=optimize,
                     jobs=jobs,
                     rotate_pages=rotate_pages,
+                    clean=clean,
                     sidecar_path=sidecar_path,
                     image_dpi=image_dpi,
                     oversample=oversample,
                     tesseract_timeout_sec=tesseract_timeout_sec,
                     hard_timeout_sec=hard_timeout_sec,
                     progress_cb=progress_cb,
+                    verbose_log=verbose_log,
+                    omp_thread_limit=omp,
+                    tessdata_prefix=tessdata_eng,
                 )
                 _emit_progress(progress_cb, "[cli] done (lang=eng)", 1.0)
                 return
@@ -224,10 +415,14 @@ def run_ocr(
             optimize=optimize,
             jobs=jobs,
             rotate_pages=rotate_pages,
+            clean=clean,
             sidecar_path=sidecar_path,
             image_dpi=image_dpi,
             oversample=oversample,
             tesseract_timeout_sec=tesseract_timeout_sec,
+            tessdata_prefix=tessdata,
+            worker=worker,
+            hard_timeout_sec=hard_timeout_sec,
         )
         return
     except Exception as e_py:
@@ -240,15 +435,109 @@ def run_ocr(
         optimize=optimize,
         jobs=jobs,
         rotate_pages=rotate_pages,
+        clean=clean,
         sidecar_path=sidecar_path,
         image_dpi=image_dpi,
         oversample=oversample,
         tesseract_timeout_sec=tesseract_timeout_sec,
         hard_timeout_sec=hard_timeout_sec,
         progress_cb=progress_cb,
+        verbose_log=verbose_log,
+        omp_thread_limit=omp,
+        tessdata_prefix=tessdata,
     )
 
 
+# ------------------------------
+# 公開 API：複数ファイルのプロセス並列
+# ------------------------------
+def _ocr_batch_init() -> None:
+    """ワーカープロセスの初期化：tesseract の OpenMP スレッドと --jobs の取り合いを防ぐ。"""
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def _ocr_batch_one(src: Path, dst: Path, kwargs: Dict[str, Any]) -> Optional[str]:
+    """
+    ワーカー側で 1 ファイル OCR。例外はプロセス境界を越えられるよう文字列で返す。
+
+    OMP_THREAD_LIMIT は _ocr_batch_init で設定済みなので omp_thread_limit=None で呼ぶ。
+    ワーカーは 1 件ずつ直列に処理するので TESSDATA_PREFIX もここで os.environ に入れ、
+    run_ocr が OcrWorker の子プロセスを立てずにこのプロセス内で ocrmypdf を呼べるようにする。
+    """
+    kw = dict(kwargs, omp_thread_limit=None)
+    tessdata = _tessdata_variant_dir(kw.get("tessdata_variant", "fast"), _pick_lang(kw.get("lang", "")))
+    saved = os.environ.get("TESSDATA_PREFIX")
+    if tessdata:
+        os.environ["TESSDATA_PREFIX"] = tessdata
+    try:
+        run_ocr(src, dst, **kw)
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    finally:
+        if saved is None:
+            os.environ.pop("TESSDATA_PREFIX", None)
+        else:
+            os.environ["TESSDATA_PREFIX"] = saved
+
+
+def run_ocr_batch(
+    items: Iterable[Tuple[Path, Path, Dict[str, Any]]],
+    *,
+    workers: Optional[int] = None,
+    jobs: Optional[int] = None,
+    progress_cb: ProgressCB = None,
+) -> List[Tuple[Path, Path, Optional[str]]]:
+    """
+    複数 PDF の OCR をファイル単位でプロセス並列に実行する。
+
+    Parameters
+    ----------
+    items : Iterable[(src, dst, kwargs)]
+        kwargs は run_ocr のキーワード引数（lang は必須）。progress_cb は無視される。
+    workers : int, optional
+        同時に処理するファイル数。既定は √CPU。
+    jobs : int, optional
+        1 ファイルあたりの ocrmypdf --jobs。kwargs に jobs が無いときに使う。既定は CPU / workers。
+    progress_cb : callable, optional
+        親プロセス側でファイル完了ごとに呼ばれる（msg, frac）。ページ進捗は出ない。
+
+    Returns
+    -------
+    list[(src, dst, error)]
+        入力順。成功時 error は None、失敗時は例外の文字列。
+    """
+    todo = [(Path(src), Path(dst), dict(kw or {})) for src, dst, kw in items]
+    if not todo:
+        return []
+
+    cpu = os.cpu_count() or 1
+    workers = max(1, int(workers or math.isqrt(cpu)))
+    jobs = max(1, int(jobs or cpu // workers))
+    for _, _, kw in todo:
+        kw.pop("progress_cb", None)  # 子プロセスへは渡せない（pickle 不可・UI は親側）
+        kw.setdefault("jobs", jobs)
+
+    errors: List[Optional[str]] = [None] * len(todo)
+    _emit_progress(progress_cb, f"OCR batch: {len(todo)} files, workers={workers}, jobs={jobs}", 0.0)
+    # Streamlit サーバーはスレッドを多数抱えているので fork ではなく forkserver で子を作る（Windows は spawn）
+    ctx = mp.get_context("forkserver") if "forkserver" in mp.get_all_start_methods() else None
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(todo)), mp_context=ctx, initializer=_ocr_batch_init
+    ) as ex:
+        futs = {ex.submit(_ocr_batch_one, src, dst, kw): i for i, (src, dst, kw) in enumerate(todo)}
+        for done, fut in enumerate(as_completed(futs), start=1):
+            i = futs[fut]
+            try:
+                errors[i] = fut.result()
+            except Exception as e:  # ワーカー異常終了など
+                errors[i] = f"{type(e).__name__}: {e}"
+            status = "done" if errors[i] is None else f"failed: {errors[i]}"
+            _emit_progress(progress_cb, f"[{done}/{len(todo)}] {todo[i][0].name} {status}", done / len(todo))
+
+    return [(src, dst, err) for (src, dst, _), err in zip(todo, errors)]
+
+
 # ------------------------------
 # 実体：Python API
 # ------------------------------
@@ -264,18 +553,25 @@ def _run_python(
     image_dpi: int,
     oversample: int,
     tesseract_timeout_sec: int,
+    tessdata_prefix: Optional[str] = None,
+    clean: bool = True,
+    worker: Optional["OcrWorker"] = None,
+    hard_timeout_sec: Optional[int] = None,
 ) -> None:
     """
     OCRmyPDF の Python API を用いる実体処理。
     ※ Python API はページ進捗を外へ出せない。
+    worker を渡すと、このプロセスではなく常駐ワーカー側で ocrmypdf.ocr を呼ぶ。
+    TESSDATA_PREFIX を今の値から切り替える必要があるときだけ単発の子プロセスで実行する
+    （Streamlit はセッションを同一プロセスのスレッドで回すので、os.environ は触らない）。
+    OMP_THREAD_LIMIT は ocrmypdf がジョブごとに管理するので、ここでは子プロセスを立てる理由にしない。
     """
-    import ocrmypdf
-    kwargs = dict(
+    kwargs: Dict[str, Any] = dict(
         language=lang,
         output_type="pdf",
         optimize=int(optimize),
-        deskew=True,
-        clean=True,
+        deskew=bool(clean),
+        clean=bool(clean),
         progress_bar=False,
         jobs=int(jobs),
         skip_text=True,
@@ -288,12 +584,261 @@ def _run_python(
         kwargs["rotate_pages"] = True
     if sidecar_path is not None:
         kwargs["sidecar"] = str(sidecar_path)
+
+    env = _ocr_env_updates(os.environ, None, tessdata_prefix)
+    if worker is not None:
+        worker.ocr(src, dst, kwargs, env=env, timeout=hard_timeout_sec)
+        return
+    if env:
+        # 単発のワーカーで実行（環境変数はワーカー側の os.environ にだけ入る）
+        with OcrWorker() as w:
+            w.ocr(src, dst, kwargs, env=env, timeout=hard_timeout_sec)
+        return
+
+    import ocrmypdf
     ocrmypdf.ocr(str(src), str(dst), **kwargs)
 
 
+# ------------------------------
+# 常駐ワーカー（ファイルごとの Python 起動・ocrmypdf import を省く）
+# ------------------------------
+# 子プロセス側のループ：1 行 1 JSON の依頼を受け、1 行 1 JSON で結果を返す。
+# ocrmypdf のログが応答行に混ざらないよう、stdout は stderr に付け替えておく。
+_WORKER_SRC = r"""
+import json, os, sys
+out = sys.stdout
+sys.stdout = sys.stderr
+import ocrmypdf
+for line in sys.stdin.buffer:  # 依頼は UTF-8 の JSON 行（ロケールの既定エンコーディングに依らない）
+    req = json.loads(line)
+    env = req.get("env") or {}
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        rc = ocrmypdf.ocr(req["src"], req["dst"], **req["kwargs"])
+        res = {"ok": int(rc or 0) == 0, "error": f"exit code {int(rc or 0)}"}
+    except Exception as e:
+        res = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    out.write(json.dumps(res) + "\n")
+    out.flush()
+"""
+
+
+class OcrWorker:
+    """
+    ocrmypdf を import 済みのまま待機する常駐 Python プロセス。
+
+    多数の PDF を続けて OCR するとき、ファイルごとの Python 起動と ocrmypdf の
+    import を 1 回に償却する。run_ocr(..., worker=w) で使う（progress_cb なしの経路）。
+
+        with OcrWorker() as w:
+            for src, dst in pairs:
+                run_ocr(src, dst, lang="jpn+eng", worker=w)
+
+    ワーカーが落ちた場合は次の依頼で自動的に起動し直す。
+    1 件の待ち時間は timeout（既定 DEFAULT_TIMEOUT_SEC）までで、超えたらワーカーを止めて TimeoutError。
+    """
+
+    DEFAULT_TIMEOUT_SEC = 3600  # run_ocr の hard_timeout_sec 既定と同じ
+
+    def __init__(self, python: Optional[str] = None) -> None:
+        self._python = python or sys.executable
+        self._proc: Optional[subprocess.Popen] = None
+        self._pump: Optional["queue.Queue[bytes]"] = None
+        self._buf = b""
+
+    def _ensure(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            # 応答はバイナリのまま受け、_recv_line で行に切ってからデコードする
+            # （TextIOWrapper のバッファに残った分は select から見えないため）
+            self._proc = subprocess.Popen(
+                [self._python, "-c", _WORKER_SRC],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            assert self._proc.stdout is not None
+            self._buf = b""
+            self._pump = _start_pipe_pump(self._proc.stdout.fileno()) if os.name == "nt" else None
+        return self._proc
+
+    def _recv_line(self, proc: subprocess.Popen, timeout: float) -> Optional[str]:
+        """応答 1 行を返す。EOF なら ""、timeout 秒以内に届かなければ None。"""
+        assert proc.stdout is not None
+        fd = proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._buf:
+            remain = deadline - time.monotonic()
+            if remain <= 0:
+                return None
+            if self._pump is not None:
+                try:
+                    chunk = self._pump.get(timeout=remain)
+                except queue.Empty:
+                    return None
+            else:
+                if not select.select([fd], [], [], remain)[0]:
+                    return None
+                chunk = os.read(fd, 65536)
+            if not chunk:
+                return ""
+            self._buf += chunk
+        line, _, self._buf = self._buf.partition(b"\n")
+        return line.decode("utf-8", errors="replace")
+
+    def ocr(
+        self,
+        src: Path,
+        dst: Path,
+        kwargs: Dict[str, Any],
+        *,
+        env: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """ワーカーで ocrmypdf.ocr(src, dst, **kwargs) を実行。失敗時は例外。"""
+        proc = self._ensure()
+        assert proc.stdin is not None
+        req = {"src": str(src), "dst": str(dst), "kwargs": kwargs, "env": env or {}}
+        try:
+            proc.stdin.write((json.dumps(req, ensure_ascii=False) + "\n").encode("utf-8"))
+            proc.stdin.flush()
+        except OSError as e:
+            self.close()
+            raise RuntimeError(f"OCR worker is not available: {e}")
+
+        if timeout is None:
+            timeout = self.DEFAULT_TIMEOUT_SEC
+        line = self._recv_line(proc, timeout)
+        if line is None:
+            self.close(kill=True)
+            raise TimeoutError(f"OCR timed out (> {timeout}s): {src}")
+        if not line:
+            self.close()
+            raise RuntimeError("OCR worker exited unexpectedly")
+        res = json.loads(line)
+        if not res.get("ok"):
+            raise RuntimeError(res.get("error") or "OCR failed")
+
+    def close(self, *, kill: bool = False) -> None:
+        """ワーカーを終了（stdin を閉じて終了を待つ。kill=True なら即時）。"""
+        proc, self._proc = self._proc, None
+        self._pump, self._buf = None, b""
+        if proc is None:
+            return
+        try:
+            if kill:
+                proc.kill()
+            else:
+                if proc.stdin:
+                    proc.stdin.close()
+                proc.wait(timeout=10)
+        except Exception:
+            proc.kill()
+        finally:
+            try:
+                proc.wait(timeout=5)
+            except Exception:
+                pass
+
+    def __enter__(self) -> "OcrWorker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _ocr_env_updates(
+    base_env, omp_thread_limit: Optional[int], tessdata_prefix: Optional[str]
+) -> Dict[str, str]:
+    """OCR 実行時に上書きする環境変数（OMP_THREAD_LIMIT は既存値を尊重、既存と同じ値は含めない）。"""
+    upd: Dict[str, str] = {}
+    if omp_thread_limit is not None and "OMP_THREAD_LIMIT" not in base_env:
+        upd["OMP_THREAD_LIMIT"] = str(int(omp_thread_limit))
+    if tessdata_prefix and base_env.get("TESSDATA_PREFIX") != tessdata_prefix:
+        upd["TESSDATA_PREFIX"] = tessdata_prefix
+    return upd
+
+
 # ------------------------------
 # 実体：CLI（逐次ログ＋タイムアウト＋ページ進捗％）
 # ------------------------------
+def _open_pidfd(pid: int) -> Optional[int]:
+    """子プロセスの pidfd（終了すると読み取り可能になる）を返す。非対応環境では None。"""
+    try:
+        return os.pidfd_open(pid)  # type: ignore[attr-defined]
+    except (AttributeError, OSError):
+        return None
+
+
+def _kill_process_group(proc: subprocess.Popen, grace: float = 2.0) -> None:
+    """
+    start_new_session（Windows は CREATE_NEW_PROCESS_GROUP）で起動した子をグループごと止める。
+    本体が生きていれば SIGTERM → grace 秒待つ → 残りを SIGKILL。既に居なければ何もしない。
+    Windows（パイプ読みはスレッド経路）では CTRL_BREAK → grace 秒待つ → taskkill /T で子孫ごと強制終了。
+    """
+    if os.name == "nt":
+        if proc.poll() is None:
+            try:
+                proc.send_signal(signal.CTRL_BREAK_EVENT)  # type: ignore[attr-defined]
+                proc.wait(timeout=grace)
+            except Exception:
+                # プロセスグループ単位の kill が無いので、ツリーごと止める（失敗時は本体だけ）
+                subprocess.run(
+                    ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
+                )
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+        return
+
+    pgid = proc.pid  # start_new_session=True なので pgid == pid
+    if proc.poll() is None:
+        try:
+            os.killpg(pgid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+        try:
+            proc.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            pass
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    if proc.poll() is None:
+        proc.wait()
+
+
+def _start_pipe_pump(fd: int) -> "queue.Queue[bytes]":
+    """
+    fd を別スレッドでブロッキング読みし、読めた塊をキューに積む（EOF/エラーで b"" を積んで終わる）。
+    select がパイプに使えない Windows 用。メインループはキューをタイムアウト付きで待つ。
+    """
+    q: "queue.Queue[bytes]" = queue.Queue()
+
+    def _pump() -> None:
+        try:
+            while True:
+                b = os.read(fd, 65536)
+                q.put(b)
+                if not b:
+                    return
+        except OSError:
+            q.put(b"")
+
+    threading.Thread(target=_pump, name="ocrmypdf-stdout", daemon=True).start()
+    return q
+
+
+_EMIT_MIN_INTERVAL = 0.2  # progress_cb の最短間隔（秒）＝最大 5 回/秒（ページ変化時は除く）
+
+
 def _run_cli_streaming(
     src: Path,
     dst: Path,
@@ -308,6 +853,10 @@ def _run_cli_streaming(
     tesseract_timeout_sec: int,
     hard_timeout_sec: int,
     progress_cb: ProgressCB,
+    omp_thread_limit: Optional[int] = None,
+    tessdata_prefix: Optional[str] = None,
+    clean: bool = True,
+    verbose_log: bool = False,
 ) -> None:
     exe = shutil.which("ocrmypdf")
     if not exe:
@@ -317,7 +866,6 @@ def _run_cli_streaming(
         exe,
         "--language", lang,
         "--output-type", "pdf",
-        "--deskew", "--clean",
         "--optimize", str(int(optimize)),
         "--jobs", str(int(jobs)),
         "--skip-text",
@@ -328,10 +876,13 @@ def _run_cli_streaming(
     ]
 
     # ★ 存在検知してから付ける（古い ocrmypdf 互換）
-    if _ocrmypdf_supports_progress_bar():
+    #    進捗を見る人がいない（progress_cb なし）ならプログレスバー出力も検知の subprocess も不要
+    if progress_cb is not None and _ocrmypdf_supports_progress_bar():
         # plain は "Page x/y" 系の文字列が出やすい
         cmd.extend(["--progress-bar", "plain"])
 
+    if clean:
+        cmd.extend(["--deskew", "--clean"])
     if rotate_pages:
         cmd.append("--rotate-pages")
     if sidecar_path is not None:
@@ -341,74 +892,140 @@ def _run_cli_streaming(
 
     env = dict(os.environ)
     env.setdefault("LANG", "C")
+    env.update(_ocr_env_updates(env, omp_thread_limit, tessdata_prefix))
 
-    # ここは UI で表示したいこともあるので出す（ただし progress_cb が無い場合は無害）
-    _emit_progress(progress_cb, f"$ {shlex.join(cmd)}", 0.0)
+    # ここは UI で表示したいこともあるので出す（progress_cb が無ければ shlex.join 自体しない）
+    if progress_cb is not None:
+        _emit_progress(progress_cb, f"$ {shlex.join(cmd)}", 0.0)
 
+    # stdout はバイナリのまま受け取り、下のループで os.read ＋ インクリメンタルデコードする
+    # （text=True / bufsize=1 の行バッファ TextIOWrapper は使わない）
+    # 新しいプロセスグループで起動し、タイムアウト時は tesseract / gs / unpaper など孫ごと止める
+    if os.name == "nt":
+        group_kw: Dict[str, Any] = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        group_kw = {"start_new_session": True}
     proc = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
         env=env,
+        **group_kw,
     )
 
     start = time.time()
     last_out = start
-    lines: list[str] = []
+    lines: deque[str] = deque(maxlen=80)  # エラー表示用に末尾だけ保持（全ログは溜めない）
 
     last_frac: float = 0.0
+    pidfd: Optional[int] = None
+    # progress_cb は UI 更新（Streamlit の再描画）を伴うので間引く:
+    # ページ番号が変わったときは必ず、それ以外は _EMIT_MIN_INTERVAL 秒に 1 回まで
+    last_emit_ts = 0.0
+    last_page: Optional[Tuple[int, int]] = None
 
     try:
         assert proc.stdout is not None
+        # パイプは select で「読める/タイムアウト」まで眠って待つ（固定 sleep のポーリングをしない）。
+        # 読めた分だけ os.read し、改行（\r\n / \r も）を TextIOWrapper と同じ規則で \n に揃えて行に切る。
+        fd = proc.stdout.fileno()
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True
+        )
+        pending = ""
+        eof = False
+        # 子の終了も select で待てるよう pidfd を使う（Linux 5.3+）。
+        # 取れない環境では従来どおり、無出力で起きたときだけ poll() で終了を確認する。
+        # Windows の select はソケット専用なので、パイプは読み取りスレッド＋キューで待つ。
+        pump = _start_pipe_pump(fd) if os.name == "nt" else None
+        if pump is None:
+            pidfd = _open_pidfd(proc.pid)
+        watch = [fd] if pidfd is None else [fd, pidfd]
+        idle_wait = 1.0 if pidfd is None else 5.0
 
-        while True:
-            line = proc.stdout.readline()
+        while not eof:
+            remain = hard_timeout_sec - (time.time() - start)
+            if remain <= 0:
+                try:
+                    _kill_process_group(proc)
+                finally:
+                    raise TimeoutError(f"OCR timed out (> {hard_timeout_sec}s): {src}")
+
+            chunk: Optional[bytes]
+            if pump is not None:
+                try:
+                    chunk = pump.get(timeout=min(idle_wait, remain))
+                except queue.Empty:
+                    chunk = None
+                    if proc.poll() is not None:
+                        # 本体は終了済み。読み取りスレッドが最後の分を積むのを少しだけ待って終える
+                        try:
+                            chunk = pump.get(timeout=0.5)
+                        except queue.Empty:
+                            chunk = b""
+            else:
+                ready, _, _ = select.select(watch, [], [], min(idle_wait, remain))
+                if fd in ready:
+                    chunk = os.read(fd, 65536)  # b"" なら EOF（終了コードは最後の wait で 1 回だけ取る）
+                elif (pidfd in ready) if pidfd is not None else (proc.poll() is not None):
+                    chunk = b""  # 本体は終了済み（孫プロセスがパイプを握っている等）→ 残りを処理して終える
+                else:
+                    chunk = None
             now = time.time()
 
-            if line:
-                line = line.rstrip("\n")
+            if chunk is None:
+                # 無出力が長いときだけ軽く通知
+                if (now - last_out) > 180:
+                    _emit_progress(progress_cb, f"(no output for {int(now - last_out)}s… still working)", last_frac)
+                continue
+
+            if chunk:
+                pending += decoder.decode(chunk)
+            else:
+                pending += decoder.decode(b"", final=True)
+                eof = True
+            *ready_lines, pending = pending.split("\n")
+            if eof and pending:
+                ready_lines.append(pending)
+            last_out = now
+
+            for line in ready_lines:
                 lines.append(line)
-                last_out = now
 
                 prog = _extract_page_progress(line)
                 if prog:
                     cur, total = prog
                     frac = max(0.0, min(cur / max(total, 1), 1.0))
                     last_frac = frac
-                    # ★ UI 側が解釈しやすいように、ページ情報を必ず msg に含める
-                    _emit_progress(progress_cb, f"Page {cur}/{total}", frac)
+                    if prog != last_page or (now - last_emit_ts) >= _EMIT_MIN_INTERVAL:
+                        last_page = prog
+                        last_emit_ts = now
+                        # ★ UI 側が解釈しやすいように、ページ情報を必ず msg に含める
+                        _emit_progress(progress_cb, f"Page {cur}/{total}", frac)
                     continue
 
-                # ページ情報以外はノイズになりがちなので、進捗としては出さない（ただし最後のデバッグ用に保持）
-                # 必要なら UI 側で msg を表示できるよう、frac は last_frac を添える。
-                _emit_progress(progress_cb, line, last_frac)
-
-            else:
-                if proc.poll() is not None:
-                    break
-
-                # 無出力が長いときだけ軽く通知
-                if (now - last_out) > 180:
-                    _emit_progress(progress_cb, f"(no output for {int(now - last_out)}s… still working)", last_frac)
-
-                if (now - start) > hard_timeout_sec:
-                    try:
-                        proc.kill()
-                    finally:
-                        raise TimeoutError(f"OCR timed out (> {hard_timeout_sec}s): {src}")
+                # ページ情報以外はノイズになりがちなので、既定では進捗として出さない（末尾はエラー表示用に保持）。
+                # verbose_log=True のときだけ、frac に last_frac を添えて間引きつつ流す。
+                if verbose_log and (now - last_emit_ts) >= _EMIT_MIN_INTERVAL:
+                    last_emit_ts = now
+                    _emit_progress(progress_cb, line, last_frac)
 
-                time.sleep(0.2)
+        try:
+            proc.wait(timeout=max(hard_timeout_sec - (time.time() - start), 0.1))
+        except subprocess.TimeoutExpired:
+            _kill_process_group(proc)
+            raise TimeoutError(f"OCR timed out (> {hard_timeout_sec}s): {src}")
 
         rc = proc.returncode
         if rc != 0:
-            msg = "\n".join(lines[-80:])  # 末尾だけ
+            msg = "\n".join(lines)  # 末尾だけ
             raise RuntimeError(f"ocrmypdf exit code {rc}\n{msg}")
 
     finally:
+        if pidfd is not None:
+            os.close(pidfd)
+        # 本体が終わっていても、パイプを握ったまま残った孫がいればここで片付ける
         try:
-            if proc and proc.poll() is None:
-                proc.kill()
+            _kill_process_group(proc)
         except Exception:
             pass
\ No newline at end of file
@@ -4,6 +4,13 @@ from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Tuple
 import json
+import os
+import uuid
+
+try:
+    import orjson  # 任意：あれば side.json の読み書きを高速化
+except ImportError:  # 未導入なら標準 json を使う
+    orjson = None  # type: ignore[assignment]
 
 SIDE_SUFFIX = "_side.json"
 # 既定は Asia/Tokyo (+09:00)。UTC にしたい場合は timezone.utc に置き換え可。
@@ -13,20 +20,55 @@ def sidecar_path_for(pdf_path: Path) -> Path:
     """<basename>.pdf → <basename>_side.json のパスを返す"""
     return pdf_path.with_name(pdf_path.stem + SIDE_SUFFIX)
 
+# スマート引用符 → 標準の記号（str.translate で 1 パス変換）
+_SMART_QUOTE_TABLE = str.maketrans({"“": "\"", "”": "\"", "’": "'"})
+
 def normalize_json_text(s: str) -> str:
     """スマート引用符など JSON として不正な記号を標準の記号に変換"""
-    return s.replace("“", "\"").replace("”", "\"").replace("’", "'")
+    return s.translate(_SMART_QUOTE_TABLE)
+
+def _dumps(data: dict) -> bytes:
+    """side.json 用に UTF-8・インデント 2 で直列化（orjson / 標準 json で同じ見た目）"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    同じフォルダの一時ファイルに書いて fsync → os.replace で差し替える（原子的な書き込み）。
+    読み手（UI など）が書きかけの side.json を見ることはない。
+    """
+    # mkstemp は 0600 で作るため、通常の書き込みと同じ権限（umask 準拠）になるよう自前で作る
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
 def load_sidecar_dict(sc_path: Path) -> Optional[dict]:
     """side.json を dict で読み取る（失敗時 None）。スマート引用符耐性あり。"""
     if not sc_path.exists():
         return None
-    raw = sc_path.read_text(encoding="utf-8")
+    raw = sc_path.read_bytes()
     try:
-        return json.loads(raw)
+        return _loads(raw)
     except Exception:
         try:
-            return json.loads(normalize_json_text(raw))
+            return _loads(normalize_json_text(raw.decode("utf-8")).encode("utf-8"))
         except Exception:
             return None
 
@@ -40,19 +82,32 @@ def read_ocr_state_for_pdf(pdf_path: Path) -> Optional[str]:
 def find_pdf_for_sidecar(sc_path: Path) -> Optional[Path]:
     """
     *_side.json から元PDFを推定。拡張子の大小文字差異に対応。
+    親フォルダを 1 回だけ scandir し、拡張子を casefold して比較する。
     """
     stem = sc_path.stem  # e.g. 'REP10_01_side'
     base = stem[:-5] if stem.endswith("_side") else stem  # 'REP10_01'
-    # 代表的なバリエーション
-    for ext in [".pdf", ".PDF", ".Pdf", ".pDf", ".pdF"]:
-        cand = sc_path.with_name(base + ext)
-        if cand.exists():
-            return cand
-    # 念のため親フォルダを走査
-    for p in sc_path.parent.glob(base + ".*"):
-        if p.suffix.lower() == ".pdf":
-            return p
-    return None
+    found: Optional[Path] = None
+    try:
+        with os.scandir(sc_path.parent) as it:
+            for ent in it:
+                name = ent.name
+                # ベース名は side.json 側と完全一致、拡張子だけ大小文字を無視
+                if len(name) != len(base) + 4 or not name.startswith(base):
+                    continue
+                if name[len(base):].casefold() != ".pdf":
+                    continue
+                try:
+                    if not ent.is_file():
+                        continue
+                except OSError:
+                    continue
+                if name.endswith(".pdf"):
+                    return Path(ent.path)  # 小文字 .pdf を優先
+                if found is None:
+                    found = Path(ent.path)
+    except OSError:
+        return None
+    return found
 
 def ensure_sidecar(pdf_path: Path, ocr_state: str, *, overwrite: bool=False) -> Tuple[bool, str]:
     """
@@ -69,27 +124,32 @@ def ensure_sidecar(pdf_path: Path, ocr_state: str, *, overwrite: bool=False) ->
         "created_at": datetime.now(tz=JST).isoformat(),
         "ocr": ocr_state,
     }
-    sc.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    _atomic_write_bytes(sc, _dumps(payload))
     return (True, "created")
 
 def update_sidecar_ocr(pdf_path: Path, new_state: str) -> Tuple[bool, str]:
     """
     side.json の 'ocr' を new_state に更新。
     無ければ規定構造で新規作成（created）。
-    戻り値: (変更があったか, 'created'|'updated')
+    既に同じ状態で欠けている項目も無ければ書き込まない（unchanged）。
+    戻り値: (変更があったか, 'created'|'updated'|'unchanged')
     """
     sc = sidecar_path_for(pdf_path)
     data = load_sidecar_dict(sc) or {}
     if not isinstance(data, dict):
         data = {}
 
-    changed = False
+    # 書き換える前に判定する（'ocr' を入れた後だと常に updated になってしまう）
+    created = "ocr" not in data
+    needs_write = False
     if "type" not in data:
-        data["type"] = "image_pdf"; changed = True
+        data["type"] = "image_pdf"; needs_write = True
     if "created_at" not in data:
-        data["created_at"] = datetime.now(tz=JST).isoformat(); changed = True
+        data["created_at"] = datetime.now(tz=JST).isoformat(); needs_write = True
     if data.get("ocr") != new_state:
-        data["ocr"] = new_state; changed = True
+        data["ocr"] = new_state; needs_write = True
 
-    sc.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-    return (True, "created" if "ocr" not in data else "updated")
+    if not needs_write:
+        return (False, "unchanged")
+    _atomic_write_bytes(sc, _dumps(data))
+    return (True, "created" if created else "updated")
@@ -1,32 +1,95 @@
 # lib/viewer/files.py
 from __future__ import annotations
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
+
+def _entry_is_dir(e: os.DirEntry) -> bool:
+    try:
+        return e.is_dir()
+    except OSError:
+        return False
 
 def list_dirs(p: Path) -> List[Path]:
     """隠しフォルダを除外して直下のディレクトリを列挙。"""
+    # 未接続の SSD などで p が無いのはよくあるので、例外にせず先に判定する
+    if not os.path.isdir(p):
+        return []
+    # os.scandir なら is_dir() は dirent の種別で判定でき、エントリごとの stat が要らない
+    # （symlink だけはリンク先を stat して従来どおりフォルダ扱いにする）。
+    # 並べ替えキー（小文字名）は 1 回だけ作って一緒に持つ
+    try:
+        with os.scandir(p) as it:
+            pairs = [(e.name.lower(), Path(e.path)) for e in it
+                     if not e.name.startswith(".") and _entry_is_dir(e)]
+    except OSError:
+        # 権限なし・判定直後の取り外しなど I/O 由来だけを握りつぶす（プログラムの誤りは隠さない）
+        return []
+    pairs.sort(key=lambda t: t[0])
+    return [c for _, c in pairs]
+
+def list_pdfs_with_mtime(p: Path) -> List[Tuple[Path, int]]:
+    """
+    隠しファイルを除外して直下の .pdf を (Path, mtime_ns) で列挙。
+    os.scandir 1 回で種別判定と stat を済ませる（iterdir + is_file + stat の二重 stat をしない）。
+    """
+    rows: List[Tuple[str, Path, int]] = []  # (小文字名, Path, mtime_ns)：小文字名は拡張子判定と並べ替えで共用
     try:
-        return sorted(
-            [c for c in p.iterdir() if c.is_dir() and not c.name.startswith(".")],
-            key=lambda x: x.name.lower(),
-        )
-    except Exception:
+        it = os.scandir(p)
+    except OSError:
+        # 未接続・権限なし・フォルダでない等は list_dirs と同じく空扱い
         return []
+    with it:
+        for ent in it:
+            name = ent.name
+            lower = name.lower()
+            if name.startswith(".") or not lower.endswith(".pdf"):
+                continue
+            try:
+                if not ent.is_file():
+                    continue
+                mtime_ns = ent.stat().st_mtime_ns
+            except OSError:
+                continue
+            rows.append((lower, Path(ent.path), mtime_ns))
+    rows.sort(key=lambda t: t[0])
+    return [(path, mtime_ns) for _, path, mtime_ns in rows]
 
 def list_pdfs(p: Path) -> List[Path]:
     """隠しファイルを除外して直下の .pdf を列挙。"""
-    if not p.exists():
-        return []
-    res: List[Path] = []
-    for c in p.iterdir():
-        if c.is_file() and not c.name.startswith(".") and c.suffix.lower() == ".pdf":
-            res.append(c)
-    return sorted(res, key=lambda x: x.name.lower())
+    return [path for path, _ in list_pdfs_with_mtime(p)]
+
+def is_ocr_name_str(name: str) -> bool:
+    """
+    ファイル名文字列が *_ocr.pdf かどうか（Path を作らずに判定）。
+    '_ocr' は大文字小文字を区別、拡張子 .pdf は区別しない。
+    """
+    return name[-4:].lower() == ".pdf" and name[:-4].endswith("_ocr")
 
 def is_ocr_name(p: Path) -> bool:
     """ファイル名が *_ocr.pdf かどうか（大文字小文字は区別）"""
-    return p.suffix.lower() == ".pdf" and p.stem.endswith("_ocr")
+    return is_ocr_name_str(p.name)
+
+def is_skip_name(p: Path) -> bool:
+    """ファイル名が *_skip.pdf かどうか（'_skip' は大文字小文字を区別）"""
+    name = p.name
+    return name[-4:].lower() == ".pdf" and name[:-4].endswith("_skip")
+
+# ファイル名の分類を 1 回の正規表現で行う（'.' 始まり / *_ocr.pdf / *_skip.pdf）。
+# '_ocr' '_skip' は大文字小文字を区別し、拡張子 .pdf だけ区別しない（is_ocr_name / is_skip_name と同じ）。
+_NAME_CLASS_RE = re.compile(r"(?P<hidden>\A\.)|(?P<ocr>_ocr)\.(?i:pdf)\Z|(?P<skip>_skip)\.(?i:pdf)\Z")
+
+def classify_name(name: str) -> str:
+    """
+    ファイル名を分類して 'hidden' | 'ocr' | 'skip' | 'normal' を返す。
+    隠し名が最優先（'.x_ocr.pdf' は 'hidden'）。
+    """
+    m = _NAME_CLASS_RE.search(name)
+    return "normal" if m is None else m.lastgroup  # type: ignore[return-value]
 
+@lru_cache(maxsize=16384)
 def dest_ocr_path(src: Path) -> Path:
-    """入力PDFの出力先パス（*_ocr.pdf）"""
+    """入力PDFの出力先パス（*_ocr.pdf）。純粋な名前変換なので結果をそのままキャッシュ（Path は不変）"""
     return src.with_name(src.stem + "_ocr.pdf")
@@ -0,0 +1,110 @@
+# lib/viewer/kind_cache.py
+# ============================================
+#  PDF 種別（画像PDF / テキストPDF）の永続キャッシュ（SQLite）
+#
+#  目的:
+#    - lru_cache / st.cache_data は Streamlit の再起動で消えるため、
+#      (path, mtime_ns) → kind をディスクに残し、再起動直後の全件再解析を避ける。
+#    - mtime_ns が一致したものだけを採用する（更新されたファイルは再解析）。
+#
+#  配置:
+#    - 既定: ~/.cache/doc-manager-app/pdf_kinds.db（XDG_CACHE_HOME があればその下）
+#    - DOC_MANAGER_KIND_CACHE で DB ファイルのパスを直接指定可。空文字なら無効化。
+#
+#  失敗時:
+#    - DB が開けない/壊れている場合は何もしない（呼び出し側は通常どおり解析する）。
+# ============================================
+
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import sqlite3
+import threading
+
+__all__ = ["get_kinds", "put_kinds"]
+
+# SQLite のプレースホルダ上限（古いビルドは 999）に収まるよう分割して問い合わせる
+_QUERY_CHUNK = 500
+
+_conn: Optional[sqlite3.Connection] = None
+_disabled = False
+_lock = threading.Lock()
+
+
+def _db_path() -> Optional[Path]:
+    env = os.environ.get("DOC_MANAGER_KIND_CACHE")
+    if env is not None:
+        return Path(env).expanduser() if env else None
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "doc-manager-app" / "pdf_kinds.db"
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """接続を遅延生成して返す（_lock 保持中に呼ぶこと）。使えなければ None。"""
+    global _conn, _disabled
+    if _conn is not None or _disabled:
+        return _conn
+    path = _db_path()
+    if path is None:
+        _disabled = True
+        return None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit はスクリプトをスレッドで回すので、接続は 1 本を _lock で直列化して共有する
+        conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS kinds ("
+            " path TEXT PRIMARY KEY, mtime INTEGER NOT NULL, kind TEXT NOT NULL)"
+        )
+        conn.commit()
+    except Exception:
+        _disabled = True  # 以後このプロセスでは使わない
+        return None
+    _conn = conn
+    return _conn
+
+
+def get_kinds(pairs: Sequence[Tuple[str, int]]) -> Dict[str, str]:
+    """
+    (path, mtime_ns) の一覧のうち、キャッシュにあり mtime_ns も一致するものを {path: kind} で返す。
+    """
+    if not pairs:
+        return {}
+    want = dict(pairs)
+    found: Dict[str, str] = {}
+    with _lock:
+        conn = _connect()
+        if conn is None:
+            return {}
+        paths = list(want)
+        try:
+            for i in range(0, len(paths), _QUERY_CHUNK):
+                chunk = paths[i:i + _QUERY_CHUNK]
+                q = "SELECT path, mtime, kind FROM kinds WHERE path IN (%s)" % ",".join("?" * len(chunk))
+                for path, mtime, kind in conn.execute(q, chunk):
+                    if want.get(path) == mtime:
+                        found[path] = kind
+        except Exception:
+            return {}
+    return found
+
+
+def put_kinds(rows: Iterable[Tuple[str, int, str]]) -> None:
+    """(path, mtime_ns, kind) をまとめて保存（同じ path は上書き）。失敗は無視。"""
+    data: List[Tuple[str, int, str]] = list(rows)
+    if not data:
+        return
+    with _lock:
+        conn = _connect()
+        if conn is None:
+            return
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO kinds (path, mtime, kind) VALUES (?, ?, ?)", data
+                )
+        except Exception:
+            pass
@@ -1,17 +1,64 @@
 # lib/viewer/pdf_flags.py
 from __future__ import annotations
+import os
+import re
+from functools import lru_cache
 from pathlib import Path
 
-def is_pdf_locked(p: Path) -> bool:
+_SNIFF_BYTES = 4096
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)")
+
+def _may_be_encrypted(p: Path) -> bool:
     """
-    PyMuPDF を用いて PDF がパスワード保護かを簡易判定。
-    失敗時は False（未ロック扱い）
+    PDF を開かずに /Encrypt の有無をバイト列で下見する（False なら暗号化なしと判断してよい）。
+    見る場所: 末尾（trailer）/ startxref が指す位置（xref ストリームの辞書）/ 先頭（線形化 PDF の trailer）
     """
+    with open(p, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(_SNIFF_BYTES)
+        if b"%PDF" not in head[:1024]:
+            return True  # PDF ヘッダが見当たらない → 判断せず PyMuPDF に任せる
+        if b"/Encrypt" in head:
+            return True
+        if size > _SNIFF_BYTES:
+            f.seek(max(size - _SNIFF_BYTES, 0))
+            tail = f.read(_SNIFF_BYTES)
+            if b"/Encrypt" in tail:
+                return True
+        else:
+            tail = head
+        m = None
+        for m in _STARTXREF_RE.finditer(tail):
+            pass
+        if m is None:
+            return True  # 壊れている可能性 → PyMuPDF に任せる
+        f.seek(int(m.group(1)))
+        return b"/Encrypt" in f.read(_SNIFF_BYTES)
+
+@lru_cache(maxsize=4096)
+def _is_pdf_locked_cached(path_str: str, mtime_ns: int) -> bool:
+    """(path, mtime_ns) ごとに判定結果をキャッシュ（mtime_ns は無効化キー）"""
+    p = Path(path_str)
     try:
+        if not _may_be_encrypted(p):
+            return False
         import fitz  # PyMuPDF
-        doc = fitz.open(str(p))
+        doc = fitz.open(path_str)
         locked = bool(getattr(doc, "needs_pass", False))
         doc.close()
         return locked
     except Exception:
         return False
+
+def is_pdf_locked(p: Path) -> bool:
+    """
+    PyMuPDF を用いて PDF がパスワード保護かを簡易判定。
+    先にバイト列で /Encrypt を探し、見つからなければ PDF を開かずに False。
+    結果は (path, mtime_ns) でキャッシュし、変更の無いファイルは stat 1 回で返す。
+    失敗時は False（未ロック扱い）
+    """
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except OSError:
+        return False
+    return _is_pdf_locked_cached(str(p), mtime_ns)
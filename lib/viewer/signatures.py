@@ -1,30 +1,125 @@
 # lib/viewer/signatures.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Tuple
-from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+import os
+import sys
+import threading
 
-from lib.viewer.files import list_pdfs
+from lib.viewer import kind_cache
+from lib.viewer.files import list_pdfs_with_mtime
 from lib.pdf.info import quick_pdf_info
 
-def make_sig_from_dir(dir_path: Path) -> Tuple[Tuple[str, int], ...]:
+# フォルダ直下PDFのシグネチャ：((path, mtime_ns), ...)（名前順）
+Sig = Tuple[Tuple[str, int], ...]
+
+# キャッシュのヒット/ミス回数（get_cache_stats 用。厳密さより軽さ優先でロックはしない）
+_STATS: Dict[str, int] = dict.fromkeys(("kind_hits", "kind_misses", "disk_hits", "classified"), 0)
+
+def make_sig_from_dir(dir_path: Path) -> Sig:
     """フォルダ直下のPDFを (path, mtime_ns) の一覧に。"""
-    pdfs = list_pdfs(dir_path)
-    return tuple(sorted([(str(p), p.stat().st_mtime_ns) for p in pdfs],
-                        key=lambda t: t[0].lower()))
+    # list_pdfs_with_mtime は scandir 時の stat を返す（ファイルごとに stat し直さない）。並びも名前順で同じ。
+    # 毎回走査するので、フォルダの mtime が変わらない上書きも取りこぼさない（キャッシュは種別側の 1 段だけ）
+    return tuple((str(p), mtime_ns) for p, mtime_ns in list_pdfs_with_mtime(dir_path))
+
+# (path, mtime_ns) → kind のプロセス内キャッシュ（FIFO で上限管理）。
+# フォルダ単位ではなくファイル単位で持つので、1 ファイル増減したフォルダも残りはそのまま使える。
+_KIND_CACHE_MAX = 50000
+_KIND_CACHE: Dict[Tuple[str, int], str] = {}
+_KIND_CACHE_LOCK = threading.Lock()
+
+def _store_kinds(items: Iterable[Tuple[Tuple[str, int], str]]) -> None:
+    with _KIND_CACHE_LOCK:
+        for t, kind in items:
+            _KIND_CACHE.pop(t, None)
+            while len(_KIND_CACHE) >= _KIND_CACHE_MAX:
+                del _KIND_CACHE[next(iter(_KIND_CACHE))]  # 最も古いものから捨てる
+            _KIND_CACHE[t] = kind
 
-@lru_cache(maxsize=8192)
-def pdf_kind_counts(sig: Tuple[Tuple[str, int], ...]) -> Tuple[int, int, int]:
+def _kind_of(path_str: str, mtime_ns: int) -> str:
+    return (quick_pdf_info(path_str, mtime_ns).get("kind") or "").strip()
+
+# 未解析のPDFが多いフォルダは PyMuPDF の解析（CPU）が支配的なのでプロセス並列にする。
+# PyMuPDF は複数スレッドから同時に使えない（GIL も解放しない）ので、スレッドプールは使わない。
+# プールは呼び出しごとに作って閉じる（常駐させない）。ワーカー数は _POOL_MAX_WORKERS まで。
+_PARALLEL_MIN = 32
+_POOL_MAX_WORKERS = 4
+
+def _kinds_parallel(todo: Sequence[Tuple[str, int]]) -> Optional[List[str]]:
+    """todo の各PDFの種別をプロセスプールで求める。使えない/失敗した場合は None（呼び出し側で逐次）"""
+    if sys.platform == "win32":
+        return None  # spawn の起動コストが解析時間に見合わない
+    # Streamlit はスレッドを多数抱えているので fork ではなく forkserver で子を作る
+    ctx = mp.get_context("forkserver") if "forkserver" in mp.get_all_start_methods() else None
+    workers = max(1, min(_POOL_MAX_WORKERS, os.cpu_count() or 1))
+    paths = [path_str for path_str, _ in todo]
+    mtimes = [mtime_ns for _, mtime_ns in todo]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as ex:
+            return list(ex.map(_kind_of, paths, mtimes, chunksize=8))
+    except Exception:
+        return None  # ワーカー異常終了（BrokenProcessPool）など
+
+def pdf_kind_counts(sig: Sig) -> Tuple[int, int, int]:
     """
     quick_pdf_info によりフォルダ直下PDFの種別を集計。
     戻り値: (画像PDF数, テキストPDF数, 総数)
     """
+    # 1) プロセス内キャッシュ（st.cache_data の引数ハッシュを通さない）
+    # 2) 永続キャッシュ（kind_cache）で mtime が一致するもの
+    # 3) 残りだけ解析して両方に書き戻す
+    kinds: List[Optional[str]] = [_KIND_CACHE.get(t) for t in sig]
+    rest = [t for t, kind in zip(sig, kinds) if kind is None]
+    _STATS["kind_hits"] += len(sig) - len(rest)
+    _STATS["kind_misses"] += len(rest)
+    if rest:
+        disk = kind_cache.get_kinds(rest)
+        todo = [t for t in rest if t[0] not in disk]
+        _STATS["disk_hits"] += len(rest) - len(todo)
+        _STATS["classified"] += len(todo)
+        if todo:
+            new_kinds = _kinds_parallel(todo) if len(todo) > _PARALLEL_MIN else None
+            if new_kinds is None:
+                new_kinds = [_kind_of(path_str, mtime_ns) for path_str, mtime_ns in todo]
+            kind_cache.put_kinds((path_str, mtime_ns, kind) for (path_str, mtime_ns), kind in zip(todo, new_kinds))
+            disk.update((path_str, kind) for (path_str, _), kind in zip(todo, new_kinds))
+        _store_kinds((t, disk[t[0]]) for t in rest)
+        kinds = [disk[t[0]] if kind is None else kind for t, kind in zip(sig, kinds)]
+
     img = txt = 0
-    for path_str, mtime_ns in sig:
-        info = quick_pdf_info(path_str, mtime_ns)
-        kind = (info.get("kind") or "").strip()
+    for kind in kinds:
         if kind == "テキストPDF":
             txt += 1
         elif kind == "画像PDF":
             img += 1
     return img, txt, len(sig)
+
+def dir_sig_and_kind_counts(
+    dir_path: Path,
+) -> Tuple[Sig, Tuple[int, int, int]]:
+    """
+    make_sig_from_dir → pdf_kind_counts をまとめて呼ぶ（走査は 1 回、sig はそのまま集計に渡す）。
+    戻り値: (sig, (画像PDF数, テキストPDF数, 総数))
+    """
+    sig = make_sig_from_dir(dir_path)
+    return sig, pdf_kind_counts(sig)
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    このモジュールのキャッシュの状態（件数・上限・ヒット/ミス回数）を返す。maxsize の見直し用。
+    - kinds : (path, mtime_ns) → kind のプロセス内キャッシュ（disk_hits は永続キャッシュで解決した件数、
+              classified は実際に quick_pdf_info で解析した件数）
+    """
+    st = dict(_STATS)
+    return {
+        "kinds": {"size": len(_KIND_CACHE), "maxsize": _KIND_CACHE_MAX,
+                  "hits": st["kind_hits"], "misses": st["kind_misses"],
+                  "disk_hits": st["disk_hits"], "classified": st["classified"]},
+    }
+
+def clear_cache_stats() -> None:
+    """get_cache_stats のヒット/ミス回数を 0 に戻す（キャッシュの中身はそのまま）"""
+    for k in _STATS:
+        _STATS[k] = 0
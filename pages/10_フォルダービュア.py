@@ -1,9 +1,9 @@
 """
 pages/10_フォルダービュア.py
 ============================================
-📂 Folder Viewer — ラジオ→ボタングリッド→次階層プレビュー（1→2→3→4階層）
+📂 Folder Viewer — ラジオ→チェック表→次階層プレビュー（1→2→3→4階層）
 - 深さ1: ラジオ（単一選択）※従来どおり
-- 深さ2/3: ✅トグル式のボタングリッド（4列）
+- 深さ2/3: ✅チェック列付きの表（st.data_editor）
 - 深さ4: DataFrame表示＋CSV保存
 """
 
@@ -11,12 +11,17 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any, List, Set
 import datetime as dt
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # パス設定
 from lib.app_paths import PATHS
-from lib.fsnav.scan import safe_stat_mtime, listdir_counts, iter_dirs
+from lib.fsnav.scan import safe_stat_mtime_ns, listdir_counts, iter_dirs
 
 
 
@@ -61,74 +66,159 @@ with st.sidebar:
     st.caption(f"実パス: `{ROOT}`")
     compute_counts = st.checkbox("直下件数を計算", value=False)
 
-    # ▼ 追加：グリッド列数（＝1行あたりのボタン数）を可変に
-    st.subheader("グリッド列数（1行のボタン数）")
-    grid_cols_l2 = st.slider("深さ2の列数", min_value=1, max_value=12, value=8, step=1)
-    grid_cols_l3 = st.slider("深さ3の列数", min_value=1, max_value=10, value=4, step=1)
-
 # ------------------------------------------------------------
 # ユーティリティ
 # ------------------------------------------------------------
+# ウィジェット操作のたびにスクリプト全体が再実行されるため、一覧はキャッシュする。
+# キーにフォルダ自身の mtime_ns を含めるので、直下の追加・削除・改名があれば自動で読み直す。
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_subdir_names(base_str: str, mtime_ns: int) -> List[str]:
+    # os.scandir の DirEntry.is_dir() は readdir の d_type を使うため、エントリ毎の stat が不要
+    # （シンボリックリンクは従来どおりリンク先がディレクトリなら含める）
+    try:
+        with os.scandir(base_str) as it:
+            names = [e.name for e in it if e.is_dir()]
+    except OSError:
+        return []
+    names.sort(key=str.lower)
+    return names
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_level1_labels(root_str: str, mtime_ns: int) -> List[str]:
+    root = Path(root_str)
+    # 深さ1なので ROOT からの相対パス＝フォルダ名
+    return sorted(p.name for p in iter_dirs(root, max_depth=1, ignore_hidden=True))
+
+
 def list_subdirs_once_unfiltered(base: Path) -> List[Path]:
     """隠し・フィルタ無視で base 直下のディレクトリのみ列挙"""
-    if not base.exists() or not base.is_dir():
-        return []
-    return sorted([p for p in base.iterdir() if p.is_dir()], key=lambda x: x.name.lower())
-
-def make_rows_for_dirs(paths: List[Path], parent_rel: str) -> pd.DataFrame:
-    rows: List[Dict[str, Any]] = []
-    for p in paths:
-        m = safe_stat_mtime(p)
-        files_cnt, dirs_cnt = listdir_counts(p) if compute_counts else (None, None)
-        rows.append(
-            {
-                "path": str(p.relative_to(ROOT)),
-                "name": p.name,
-                "parent": parent_rel,
-                "modified": dt.datetime.fromtimestamp(m) if m else None,
-                "files_direct": files_cnt,
-                "dirs_direct": dirs_cnt,
-            }
-        )
-    df = pd.DataFrame(rows).sort_values(["path"]) if rows else pd.DataFrame(
-        columns=["path", "name", "parent", "modified", "files_direct", "dirs_direct"]
+    return [base / n for n in _cached_subdir_names(str(base), safe_stat_mtime_ns(base))]
+
+_PREFETCH_WORKERS = 16
+
+def prefetch_subdirs(bases: List[Path]) -> Dict[Path, List[Path]]:
+    """
+    複数フォルダの直下一覧をスレッドで並列取得して {base: [subdir, ...]} で返す。
+    NAS 等では readdir の往復待ちが支配的なので、並列に投げると待ち時間が重なる。
+    """
+    if len(bases) <= 1:
+        return {b: list_subdirs_once_unfiltered(b) for b in bases}
+    ctx = get_script_run_ctx()
+    # ワーカースレッドにも ScriptRunContext を付けて、st.cache_data をそのまま使えるようにする
+    init = (lambda: add_script_run_ctx(threading.current_thread(), ctx)) if ctx else None
+    with ThreadPoolExecutor(max_workers=min(_PREFETCH_WORKERS, len(bases)), initializer=init) as ex:
+        return dict(zip(bases, ex.map(list_subdirs_once_unfiltered, bases)))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_dir_rows(base_str: str, mtime_ns: int, parent_rel: str, want_counts: bool) -> Dict[str, List[Any]]:
+    """
+    base 直下のディレクトリ行を 1 回の os.scandir でまとめて作る（一覧・mtime・直下件数）。
+    行ごとの dict ではなく列ごとの list で返す（DataFrame 化が列の代入だけで済む）。
+    子フォルダの中身が変わっても base の mtime は変わらないため、直下件数は ttl の範囲で古いことがある。
+    """
+    paths: List[str] = []
+    names: List[str] = []
+    mtimes: List[Any] = []
+    fdir: List[Any] = []
+    ddir: List[Any] = []
+    try:
+        with os.scandir(base_str) as it:
+            for e in it:
+                try:
+                    if not e.is_dir():
+                        continue
+                except OSError:
+                    continue
+                try:
+                    m = e.stat().st_mtime  # Windows では scandir の結果を再利用（追加の stat 不要）
+                except OSError:
+                    m = 0.0
+                files_cnt, dirs_cnt = listdir_counts(Path(e.path)) if want_counts else (None, None)
+                paths.append(f"{parent_rel}/{e.name}" if parent_rel else e.name)
+                names.append(e.name)
+                # pd.to_datetime(unit="s") は UTC になるので、従来どおりローカル時刻に変換しておく
+                mtimes.append(dt.datetime.fromtimestamp(m) if m else None)
+                fdir.append(files_cnt)
+                ddir.append(dirs_cnt)
+    except OSError:
+        pass
+    return {
+        "path": paths,
+        "name": names,
+        "parent": [parent_rel] * len(paths),
+        "modified": mtimes,
+        "files_direct": fdir,
+        "dirs_direct": ddir,
+    }
+
+def make_rows_for_dirs(base: Path, parent_rel: str) -> pd.DataFrame:
+    """base 直下のディレクトリを 1 行ずつの DataFrame にする（parent_rel は base の ROOT 相対パス）"""
+    cols = _cached_dir_rows(str(base), safe_stat_mtime_ns(base), parent_rel, compute_counts)
+    df = pd.DataFrame(
+        {
+            "path": cols["path"],
+            "name": cols["name"],
+            "parent": cols["parent"],
+            "modified": pd.to_datetime(pd.Series(cols["modified"], dtype=object), errors="coerce"),
+            "files_direct": pd.array(cols["files_direct"], dtype="Int64"),
+            "dirs_direct": pd.array(cols["dirs_direct"], dtype="Int64"),
+        }
     )
-    return df
+    return df.sort_values(["path"]) if len(df) else df
+
+@st.cache_data(show_spinner=False)
+def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV（BOM付き UTF-8）のバイト列。download_button の data は毎回評価されるのでキャッシュする"""
+    return df.to_csv(index=False).encode("utf-8-sig")
 
 # ------------------------------------------------------------
-# ✅ 追加ユーティリティ：複数選択ボタングリッド
+# ✅ 追加ユーティリティ：チェック列付きの表で複数選択
 # ------------------------------------------------------------
-def multiselect_button_grid(
+def multiselect_editor(
     options: List[str],
     *,
     selected: Set[str],
-    state_prefix: str,
-    cols: int = 4,
-    mark_selected: bool = True,
+    key: str,
 ) -> Set[str]:
     """
-    チェックボックス代替：ボタンをグリッド状に並べて複数選択トグル
-    - options: 表示する選択肢（str）
-    - selected: 現在選択済み（set）。本関数内で直接更新される
-    - state_prefix: st.button の key 接頭辞（安定化用）
-    - cols: 列数（デフォルト4列）
-    - mark_selected: True なら選択中に ✅ を付ける
+    ボタングリッド代替：st.data_editor のチェック列で複数選択
+    - options: 表示する選択肢（ROOT からの相対パス str）
+    - selected: 現在選択済み（set）。options に含まれる分を本関数内で直接更新する
+    - key: st.data_editor の key（editor_key で options のダイジェストを含めたもの）
+    行数に関係なくウィジェットは 1 個なので、フォルダ数が多くても再実行時の差分が軽い。
     """
-    for i in range(0, len(options), cols):
-        row = options[i:i + cols]
-        cols_ui = st.columns(len(row))
-        for j, opt in enumerate(row):
-            is_selected = opt in selected
-            # ラベルは最後のパス要素を見やすく表示（name中心）しつつ、選択時は✅
-            label_text = Path(opt).name
-            label = f"✅ {label_text}" if (mark_selected and is_selected) else label_text
-            if cols_ui[j].button(label, key=f"{state_prefix}__{opt}"):
-                if is_selected:
-                    selected.discard(opt)
-                else:
-                    selected.add(opt)
+    df = pd.DataFrame(
+        {
+            "selected": pd.Series([o in selected for o in options], dtype=bool),
+            "name": [o.rsplit("/", 1)[-1] for o in options],
+            "path": options,
+        }
+    )
+    edited = st.data_editor(
+        df,
+        column_config={"selected": st.column_config.CheckboxColumn("✅")},
+        disabled=["name", "path"],
+        hide_index=True,
+        width="stretch",
+        key=key,
+    )
+    selected.difference_update(options)
+    selected.update(edited.loc[edited["selected"], "path"])
     return selected
 
+def editor_key(prefix: str, options: List[str]) -> str:
+    """
+    data_editor の key。編集内容は行番号で保持されるので、一覧（options）が変わったら
+    別ウィジェットにして、古い編集が別フォルダの行に当たらないようにする。
+    """
+    digest = hashlib.blake2b("\0".join(options).encode("utf-8"), digest_size=8).hexdigest()
+    return f"{prefix}__{digest}"
+
+def reset_editor(key: str) -> None:
+    """全選択/全解除の前に data_editor の編集内容を捨てる（残っていると再適用されるため）"""
+    st.session_state.pop(key, None)
+
 # ------------------------------------------------------------
 # セッション状態（選択の保持）
 # ------------------------------------------------------------
@@ -143,11 +233,10 @@ CHECKED_L2: Set[str] = st.session_state["fv_checked_l2"]
 CHECKED_L3: Dict[str, Set[str]] = st.session_state["fv_checked_l3"]
 
 # ------------------------------------------------------------
-# メイン機能：ラジオ→（深さ2/3はボタングリッド）→深さ4プレビュー
+# メイン機能：ラジオ→（深さ2/3はチェック表）→深さ4プレビュー
 # ------------------------------------------------------------
 # 深さ1のフォルダを取得（表は出さず、ラジオのみ）
-level1_paths: List[Path] = list(iter_dirs(ROOT, max_depth=1, ignore_hidden=True))
-lvl1_labels = [str(p.relative_to(ROOT)) for p in sorted(level1_paths)]
+lvl1_labels: List[str] = _cached_level1_labels(str(ROOT), safe_stat_mtime_ns(ROOT))
 
 if not lvl1_labels:
     st.info("深さ1のサブフォルダが見つかりません。")
@@ -167,26 +256,25 @@ else:
     if not lvl2_dirs:
         st.info("深さ2フォルダがありません。")
     else:
+        # ROOT からの相対パスは親の相対パス＋名前で組み立てる（relative_to は使わない）
+        rel2_list = [f"{selected_lvl1_label}/{d.name}" for d in lvl2_dirs]
+        ed_l2_key = editor_key(f"ed_l2__{selected_lvl1_label}", rel2_list)
         with st.expander(f"深さ2（{selected_lvl1_label} 直下） — {len(lvl2_dirs):,} 件", expanded=False):
             c_all, c_none, c_cnt = st.columns([1, 1, 2])
             with c_all:
                 if st.button("全選択", key="btn_l2_all"):
+                    reset_editor(ed_l2_key)
                     CHECKED_L2.clear()
-                    CHECKED_L2.update(str(p.relative_to(ROOT)) for p in lvl2_dirs)
+                    CHECKED_L2.update(rel2_list)
             with c_none:
                 if st.button("全解除", key="btn_l2_none"):
+                    reset_editor(ed_l2_key)
                     CHECKED_L2.clear()
             with c_cnt:
                 st.caption(f"選択数: {len(CHECKED_L2)} / {len(lvl2_dirs):,}")
 
-            # ✅ 深さ2：チェックボックス → ボタングリッド（4列）へ変更
-            rel2_list = [str(d.relative_to(ROOT)) for d in lvl2_dirs]
-            CHECKED_L2 = multiselect_button_grid(
-                rel2_list,
-                selected=CHECKED_L2,
-                state_prefix="btn_l2",
-                cols=grid_cols_l2,
-            )
+            # ✅ 深さ2：ボタングリッド → チェック列付きの表へ変更
+            CHECKED_L2 = multiselect_editor(rel2_list, selected=CHECKED_L2, key=ed_l2_key)
 
             # 深さ2の選択に連動して、外れたものの深さ3選択は安全に削除
             for k in list(CHECKED_L3.keys()):
@@ -195,58 +283,61 @@ else:
 
         st.divider()
 
-        # 深さ3（深さ2で選択された各フォルダの直下）— 折りたたみ＋ボタングリッド → 深さ4表示
+        # 深さ3（深さ2で選択された各フォルダの直下）— 折りたたみ＋チェック表 → 深さ4表示
         selected_lvl2_labels: List[str] = sorted(CHECKED_L2)
         if not selected_lvl2_labels:
-            st.info("深さ2のフォルダが選択されていません。ボタンで選択してください。")
+            st.info("深さ2のフォルダが選択されていません。表のチェックで選択してください。")
         else:
             st.markdown("### 深さ3 / 深さ4")
+            # 深さ3と、既にチェック済みの深さ4をまとめて先読み
+            d3_map = prefetch_subdirs([ROOT / r for r in selected_lvl2_labels])
+            d4_map = prefetch_subdirs(
+                [ROOT / r3 for r2 in selected_lvl2_labels for r3 in sorted(CHECKED_L3.get(r2, ()))]
+            )
             for rel2 in selected_lvl2_labels:
                 d2 = ROOT / rel2
-                d3_subs = list_subdirs_once_unfiltered(d2)
+                d3_subs = d3_map[d2]
 
                 # 深さ3の選択集合を初期化
                 selected_set_for_l2 = CHECKED_L3.setdefault(rel2, set())
+                rel3_list = [f"{rel2}/{p.name}" for p in d3_subs]
+                ed_l3_key = editor_key(f"ed_l3__{rel2}", rel3_list)
 
                 with st.expander(f"📁 {rel2} — 深さ3: {len(d3_subs)} 件", expanded=False):
                     c3_all, c3_none, c3_cnt = st.columns([1, 1, 2])
                     with c3_all:
                         if st.button("全選択", key=f"btn_l3_all__{rel2}"):
+                            reset_editor(ed_l3_key)
                             selected_set_for_l2.clear()
-                            selected_set_for_l2.update(str(p.relative_to(ROOT)) for p in d3_subs)
+                            selected_set_for_l2.update(rel3_list)
                     with c3_none:
                         if st.button("全解除", key=f"btn_l3_none__{rel2}"):
+                            reset_editor(ed_l3_key)
                             selected_set_for_l2.clear()
                     with c3_cnt:
                         st.caption(f"選択数: {len(selected_set_for_l2)} / {len(d3_subs)}")
 
-                    # ✅ 深さ3：チェックボックス → ボタングリッド（4列）へ変更
-                    rel3_list = [str(p.relative_to(ROOT)) for p in d3_subs]
-                    CHECKED_L3[rel2] = multiselect_button_grid(
-                        rel3_list,
-                        selected=selected_set_for_l2,
-                        state_prefix=f"btn_l3_{rel2}",
-                        cols=grid_cols_l3, 
-                    )
+                    # ✅ 深さ3：ボタングリッド → チェック列付きの表へ変更
+                    CHECKED_L3[rel2] = multiselect_editor(rel3_list, selected=selected_set_for_l2, key=ed_l3_key)
 
                     # === 深さ4（深さ3でチェックされたフォルダ 直下） ===
                     if CHECKED_L3[rel2]:
                         st.markdown("**深さ4（チェックした深さ3 直下のフォルダ）**")
                         for rel3 in sorted(CHECKED_L3[rel2]):
                             d3 = ROOT / rel3
-                            d4_subs = list_subdirs_once_unfiltered(d3)
+                            d4_subs = d4_map[d3] if d3 in d4_map else list_subdirs_once_unfiltered(d3)
                             with st.expander(f"└─ {rel3} — 深さ4: {len(d4_subs)} 件", expanded=False):
                                 if not d4_subs:
                                     st.write("（深さ4なし）")
                                 else:
-                                    df4 = make_rows_for_dirs(d4_subs, parent_rel=rel3)
+                                    df4 = make_rows_for_dirs(d3, parent_rel=rel3)
                                     st.dataframe(df4, width="stretch", height=280)
                                     st.download_button(
                                         f"⬇️ CSV保存（{rel3} 直下の深さ4）",
-                                        data=df4.to_csv(index=False).encode("utf-8-sig"),
+                                        data=df_to_csv_bytes(df4),
                                         file_name=f"depth4__{rel3.replace('/', '__')}.csv",
                                         mime="text/csv",
                                         key=f"dl_depth4__{rel3}",
                                     )
 
-st.caption("※ 表示はすべて“直下のサブフォルダのみ”（フィルタ無効）。深さ2/3はボタンで✅トグルしながら段階的に掘り下げます。")
+st.caption("※ 表示はすべて“直下のサブフォルダのみ”（フィルタ無効）。深さ2/3は表の✅をチェックしながら段階的に掘り下げます。")
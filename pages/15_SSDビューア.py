@@ -18,7 +18,9 @@
 
 import streamlit as st
 from pathlib import Path
+import os
 import re
+import time
 from collections import defaultdict
 import pandas as pd
 import sys
@@ -79,6 +81,66 @@ st.markdown(
 # =============================================================================
 # 📦 カウント系ユーティリティ（★同名ファイル重複排除）
 # =============================================================================
+# フォルダ直下の一覧メモ {dir: (mtime_ns, 作成時刻, 小文字ファイル名, サブフォルダ)}。
+# フォルダの mtime は直下の追加・削除・改名で変わるので、mtime_ns が同じなら readdir を省ける
+# （再実行のたびの全件走査が「フォルダごとの stat 1 回」になる）。ページは毎回再実行されるため
+# st.cache_resource でプロセス内に保持する。
+# ただし外付け SSD（exFAT / HFS+ 等）は mtime の分解能が粗く、走査と同じ刻みの追加では
+# mtime が変わらないことがあるので、TTL を過ぎたエントリは必ず読み直す。
+_DIR_MEMO_MAX = 200_000
+_DIR_MEMO_TTL_SEC = 60
+
+@st.cache_resource(show_spinner=False)
+def _dir_listing_memo() -> dict:
+    return {}
+
+
+def _list_dir_cached(d: str):
+    """d 直下の (小文字ファイル名 tuple, サブフォルダ path tuple) を返す。読めなければ空。"""
+    try:
+        mtime_ns = os.stat(d).st_mtime_ns  # 走査より先に取る（走査中の変更は次回 mtime 不一致で拾う）
+    except OSError:
+        return (), ()
+    memo = _dir_listing_memo()
+    now = time.monotonic()
+    hit = memo.get(d)
+    if hit is not None and hit[0] == mtime_ns and now - hit[1] < _DIR_MEMO_TTL_SEC:
+        return hit[2], hit[3]
+    files, subdirs = [], []
+    try:
+        with os.scandir(d) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        subdirs.append(e.path)
+                    elif e.is_file():
+                        # 集計はすべて小文字名で行うので、メモにも小文字で持つ。
+                        # 呼び出し側の seen_names はメモ内の文字列をそのまま参照でき、
+                        # 呼び出しごとに名前の複製（lower()）を作らずに済む
+                        files.append(e.name.lower())
+                except OSError:
+                    continue
+    except OSError:
+        return (), ()
+    if len(memo) >= _DIR_MEMO_MAX:
+        memo.clear()
+    entry = (mtime_ns, now, tuple(files), tuple(subdirs))
+    memo[d] = entry
+    return entry[2], entry[3]
+
+
+def _iter_lower_names_recursive(dirpath: Path):
+    """
+    dirpath 配下（子・孫含む）のファイル名を小文字で列挙（os.scandir による DFS、直下一覧は mtime でメモ）。
+    rglob と同じくディレクトリのシンボリックリンクは辿らない。読めないフォルダは飛ばす。
+    """
+    stack = [os.fspath(dirpath)]
+    while stack:
+        files, subdirs = _list_dir_cached(stack.pop())
+        yield from files
+        stack.extend(subdirs)
+
+
 def count_unique_exts_recursive(dirpath: Path) -> dict:
     """
     dirpath 配下（子・孫含む）のファイルを拡張子別に集計。
@@ -89,14 +151,13 @@ def count_unique_exts_recursive(dirpath: Path) -> dict:
     if not dirpath or not dirpath.exists():
         return {}
     seen_names = set()
-    for f in dirpath.rglob("*"):
-        if not f.is_file():
-            continue
-        name_lower = f.name.lower()
+    for name_lower in _iter_lower_names_recursive(dirpath):
         if name_lower in seen_names:
             continue
         seen_names.add(name_lower)
-        ext = f.suffix.lower().lstrip('.') or '(noext)'
+        # Path.suffix と同じ規則（先頭ドットのみ・末尾ドットは拡張子なし）を文字列操作だけで判定
+        i = name_lower.rfind('.')
+        ext = name_lower[i + 1:] if 0 < i < len(name_lower) - 1 else '(noext)'
         counts[ext] += 1
     return dict(counts)
 
@@ -112,23 +173,16 @@ def count_pdf_categories(dirpath: Path) -> dict:
     counts = {"pdf": 0, "skip_pdf": 0, "ocr_pdf": 0, "side_json": 0}
     if not dirpath or not dirpath.exists():
         return counts
-    seen_names = set()
-    for f in dirpath.rglob("*"):
-        if not f.is_file():
-            continue
-        name = f.name.lower()
-        if name in seen_names:
-            continue
-        seen_names.add(name)
-        if name.endswith("_side.json"):
-            counts["side_json"] += 1
-        elif name.endswith("_skip.pdf"):
-            counts["skip_pdf"] += 1
-        elif name.endswith("_ocr.pdf"):
-            counts["ocr_pdf"] += 1
-            # counts["pdf"] += 1
-        elif name.endswith(".pdf"):
-            counts["pdf"] += 1
+    seen_names = set(_iter_lower_names_recursive(dirpath))
+    if not seen_names:
+        return counts
+    # 名前ごとの if/elif をやめ、pyarrow 文字列列の str.endswith でまとめて判定（Streamlit の依存に含まれる）
+    names = pd.Series(list(seen_names), dtype="string[pyarrow]").str
+    n_pdf = int(names.endswith(".pdf").sum())  # *_skip.pdf / *_ocr.pdf を含む
+    counts["side_json"] = int(names.endswith("_side.json").sum())
+    counts["skip_pdf"] = int(names.endswith("_skip.pdf").sum())
+    counts["ocr_pdf"] = int(names.endswith("_ocr.pdf").sum())
+    counts["pdf"] = n_pdf - counts["skip_pdf"] - counts["ocr_pdf"]
     return counts
 
 # =============================================================================
@@ -192,6 +246,11 @@ PREFERRED_COLS = [
     "tif","tiff","svg","ai","psd","indd","dtd","p21","mcd","(noext)"
 ]
 
+@st.cache_data(show_spinner=False)
+def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """CSV（BOM付き UTF-8）のバイト列。download_button の data は毎回評価されるのでキャッシュする"""
+    return df.to_csv(index=False).encode("utf-8-sig")
+
 def build_df_from_pairs(pairs: list[tuple[str, Path]]) -> pd.DataFrame:
     """
     pairs: [(project_display, project_dir), ...]
@@ -243,7 +302,7 @@ def render_organized_year_section(title: str, base_dir: Path, year: int):
         st.dataframe(df, width='stretch')
         st.download_button(
             label=f"CSVをダウンロード（{title}）",
-            data=df.to_csv(index=False).encode("utf-8-sig"),
+            data=df_to_csv_bytes(df),
             file_name=f"{year}_{title.replace('/','_')}_ext_counts.csv",
             mime="text/csv",
         )
@@ -347,7 +406,7 @@ else:
                 st.dataframe(df_original, width='stretch')
                 st.download_button(
                     label="CSVをダウンロード（original/report）",
-                    data=df_original.to_csv(index=False).encode("utf-8-sig"),
+                    data=df_to_csv_bytes(df_original),
                     file_name=f"{chosen_year}_original_report_ext_counts.csv",
                     mime="text/csv",
                 )
@@ -449,7 +508,7 @@ else:
             # CSV ダウンロード
             st.download_button(
                 label="CSVをダウンロード（整合性チェック）",
-                data=df_chk.to_csv(index=False).encode("utf-8-sig"),
+                data=df_to_csv_bytes(df_chk),
                 file_name=f"{chosen_year}_consistency_check.csv",
                 mime="text/csv",
             )
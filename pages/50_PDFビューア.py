@@ -31,9 +31,9 @@ from lib.app_paths import PATHS  # organized_docs_root を既定に
 # from lib.pdf.ocr import run_ocr  # ★ OCR 実行 ← 使用箇所がなくなるためコメントアウト推奨
 
 # 切り出し済みユーティリティ（lib/viewer/*）
-from lib.viewer.files import list_dirs, list_pdfs, is_ocr_name, dest_ocr_path
+from lib.viewer.files import list_dirs, list_pdfs, is_ocr_name, dest_ocr_path, classify_name
 from lib.viewer.pdf_flags import is_pdf_locked
-from lib.viewer.signatures import make_sig_from_dir, pdf_kind_counts
+from lib.viewer.signatures import dir_sig_and_kind_counts, get_cache_stats, clear_cache_stats
 
 # *_skip.pdf 検出（あれば使う／無ければフォールバック）
 try:
@@ -100,11 +100,12 @@ with st.expander("ℹ️ このページの役割と処理フロー（PDFビュ
 ---
 
 ## ①-集計：サブフォルダ1行サマリーの作り方
-各サブフォルダについて `list_pdfs()` でPDFを走査し、次のロジックでカウントします：
+各サブフォルダについて `dir_sig_and_kind_counts()` でPDFを 1 回走査し（同時に `quick_pdf_info` の種別で
+**画像PDF / テキストPDF** の件数も集計）、次のロジックでカウントします：
 
 1. **最初に除外**  
-   - `is_ocr_name(p)` → `*_ocr.pdf` は **生成物**として `✨ ocr_generated` にカウントし、**以降の合計から除外**。  
-   - `is_skip_name(p)` → `🚫 skip_files` にカウント。
+   - `classify_name(p.name)` が `'ocr'`（`*_ocr.pdf`）→ **生成物**として `✨ ocr_generated` にカウントし、**以降の合計から除外**。  
+   - `'skip'`（`*_skip.pdf`）→ `🚫 skip_files` にカウント。
 
 2. **sidecarの`ocr`状態で振り分け**（`<basename>_side.json` を読み込み）：  
    - `'unprocessed' → ⏳ b_unprocessed（*b*）`（1つでもあれば行末に **「❌unprocessedあり」** を表示）  
@@ -124,6 +125,9 @@ with st.expander("ℹ️ このページの役割と処理フロー（PDFビュ
 
 > ねらい：**サブフォルダごとの状態をひと目で把握**（未処理・失敗・ロック・スキップ・生成物）し、問題フォルダをすばやく選べます。
 
+> 種別（画像 / テキスト）の判定結果は (パス, mtime) ごとに SQLite（`~/.cache/doc-manager-app/pdf_kinds.db`）へ保存され、
+> 再起動後も更新されていないPDFは解析し直しません（環境変数 `DOC_MANAGER_KIND_CACHE` で保存先を変更、空文字で無効）。
+
 ---
 
 ## ② PDFファイル選択（サブフォルダ直下）
@@ -312,6 +316,7 @@ st.markdown("""
 - ❌ : failed（OCR失敗） *(g)*
 - 🚫 : `<basename>_skip.pdf`（ファイル名でスキップ指定） *(3)*
 - ✨ : `*_ocr.pdf`（OCR生成物：**総数から除外**し、別カウント）
+- 種別: フォルダ内の全PDF（✨🚫 も含む）を `quick_pdf_info` で判定した 画像PDF / テキストPDF の件数
 """)
 
 ICONS = {
@@ -350,7 +355,9 @@ for tname in sorted(st.session_state.sel_top):
     st.markdown(f"**/{tname}**")
 
     for sd in subdirs:
-        pdfs = list_pdfs(sd)
+        # 走査 1 回で PDF 一覧と種別件数を得る（種別はファイル単位でキャッシュされる）
+        sig, (n_img, n_txt, _) = dir_sig_and_kind_counts(sd)
+        pdfs = [Path(path_str) for path_str, _ in sig]
 
         # カウンタ初期化
         a_no_side_text   = 0  # (a)
@@ -365,10 +372,11 @@ for tname in sorted(st.session_state.sel_top):
         any_unprocessed  = False
 
         for p in pdfs:
-            if is_ocr_name(p):              # ✨ 生成物 → 総数から除外
+            name_class = classify_name(p.name)  # 'ocr' / 'skip' / 'normal'（隠しは list 時点で除外済み）
+            if name_class == "ocr":             # ✨ 生成物 → 総数から除外
                 ocr_generated += 1
                 continue
-            if is_skip_name(p):             # 🚫 ファイル名スキップ
+            if name_class == "skip":            # 🚫 ファイル名スキップ
                 skip_files += 1
                 continue
 
@@ -427,7 +435,8 @@ for tname in sorted(st.session_state.sel_top):
             f"{ICONS['e']} {fmt3(e_skipped)} / "
             f"{ICONS['f']} {fmt3(f_locked)} / "
             f"{ICONS['g']} {fmt3(g_failed)} / "
-            f"{ICONS['_skip']} {fmt3(skip_files)} "
+            f"{ICONS['_skip']} {fmt3(skip_files)}｜"
+            f"種別 画像 {fmt3(n_img)} / テキスト {fmt3(n_txt)} "
             f"{status_tail}"
         )
 
@@ -438,6 +447,14 @@ for tname in sorted(st.session_state.sel_top):
         else:
             st.session_state.sel_mid.discard(f"{tname}/{sd.name}")
 
+# 種別キャッシュの状態（上限の見直し用）
+with st.expander("🛠 デバッグ：種別キャッシュの統計", expanded=False):
+    kinds_stats = get_cache_stats()["kinds"]
+    st.caption("hits/misses はプロセス内キャッシュ、disk_hits は永続キャッシュ（SQLite）で解決した件数、"
+               "classified は実際に quick_pdf_info で解析した件数（サーバー起動後の累計）。")
+    st.json(kinds_stats)
+    st.button("統計をリセット", key="kind_stats_reset", on_click=clear_cache_stats)
+
 # ①-集計の直後に追加：選択の整合性を整える & 仕切り線
 #  - sel_top に含まれない年配下の sel_mid を除去
 #  - 実在しないサブフォルダの sel_mid を除去